@@ -0,0 +1,175 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import main
+import encode
+import native_solver
+import cache as solution_cache
+import profiling
+import deadline
+from profiling import stage
+
+# Batch mode: solve every instance of a folder (or glob) with a pool of worker processes.
+# Each worker imports clingo (through main.py) once and then solves many instances.
+# Results are written to one JSONL file, one line per instance:
+#   {"instance": ..., "status": ..., "n": ..., "grid": [...], "times": {...}, "stages": [...], "clingo": {...}}
+# status is UNIQUE, MULTIPLE, UNSATISFIABLE, TIMEOUT or ERROR. "stages" and "clingo" are the per-stage
+# measurements and solver statistics of profiling.StageTimer. A TIMEOUT (--budget) also has
+# "partial": the number of filled, empty and undecided cells known when the search stopped.
+
+_caches = {}  # cache folder -> SolutionCache of this worker process
+
+
+def find_instances(pattern):
+    # A folder means every .txt inside it, otherwise it is used as a glob (.thb files also work)
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.txt")
+    return sorted(glob.glob(pattern))
+
+
+def solve_instance(input_txt, solver="clingo", draw_dir=None, cache_dir=None, trace=False, budget=None):
+    # Runs in the worker: parse, encode and solve one instance, without printing or writing files.
+    # With draw_dir, the solution is also rendered (headless) to draw_dir/sol_<name>.png
+    # With cache_dir, the solution cache is looked up first (and filled after solving)
+    # With trace, the Chrome trace events of the stages are returned in result["trace"]
+    # With budget, the search is stopped after that many seconds (or deadline.BUDGETS-like list)
+    result = {"instance": input_txt, "status": "ERROR", "n": None, "grid": None, "times": {}}
+    timer = profiling.StageTimer(input_txt)
+    try:
+        with stage(timer, "parse"):
+            data = main.parse_instance(input_txt, as_puzzle=True)
+        if data is None:
+            return finish(result, timer, trace)
+        result["n"] = data.n
+        if isinstance(budget, list):
+            budget = deadline.default_budget(data.n, budget)
+        partial_result = {}
+
+        cache = None
+        if cache_dir is not None:
+            if cache_dir not in _caches:
+                _caches[cache_dir] = solution_cache.SolutionCache(cache_dir)
+            cache = _caches[cache_dir]
+        with stage(timer, "cache"):
+            hit = cache.get(data) if cache is not None else None
+        result["cached"] = hit is not None
+
+        if hit is not None:
+            result["status"], result["grid"] = hit
+        elif solver == "native":
+            with stage(timer, "solve"):
+                size, fills, nummodels = native_solver.solve_puzzle(data, budget, partial_result)
+        else:
+            with stage(timer, "encode"):
+                facts = encode.encode_puzzle(data)
+            size, fills, nummodels = main.solve(facts, timer=timer, budget=budget, partial=partial_result)
+    except (Exception, SystemExit) as e:  # the parsers call sys.exit on bad input
+        result["error"] = str(e)
+        return finish(result, timer, trace)
+
+    if not result["cached"]:
+        result["status"] = main.status_of(nummodels, partial_result)
+        if nummodels > 0:
+            with stage(timer, "decode"):
+                result["grid"] = main.solution_grid(size, fills)
+        if result["status"] == "TIMEOUT":
+            result["partial"] = {key: len(partial_result[key]) for key in ("filled", "empty", "undecided")}
+        elif cache is not None:
+            with stage(timer, "cache"):
+                cache.put(data, result["status"], result["grid"])
+
+    if result["grid"] is not None and draw_dir is not None:
+        import drawthermo  # sprites are cached per worker process
+        base_name = os.path.splitext(os.path.basename(input_txt))[0]
+        with stage(timer, "draw"):
+            drawthermo.render_puzzle(data, result["grid"], os.path.join(draw_dir, f"sol_{base_name}.png"))
+    return finish(result, timer, trace)
+
+
+def finish(result, timer, trace):
+    # Add the measurements of timer to the result
+    report = timer.report()
+    result["times"] = timer.times()
+    result["times"]["total"] = report["total"]["wall"]
+    result["stages"] = report["stages"]
+    result["clingo"] = report["clingo"]
+    if trace:
+        result["trace"] = timer.chrome_trace_events()
+    return result
+
+
+def run_batch(instances, out_jsonl, workers=None, chunksize=1, solver="clingo", draw_dir=None, cache_dir=None,
+              trace_json=None, budget=None):
+    # Solve all instances and write the results (in input order). Returns a count per status.
+    # With trace_json, the stages of all workers are saved there as one Chrome trace.
+    counts = {}
+    events = []
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(out_jsonl, "w", encoding="utf-8") as f:
+        worker = partial(solve_instance, solver=solver, draw_dir=draw_dir, cache_dir=cache_dir,
+                         trace=trace_json is not None, budget=budget)
+        for result in pool.map(worker, instances, chunksize=chunksize):
+            events.extend(result.pop("trace", []))
+            f.write(json.dumps(result) + "\n")
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+    if trace_json is not None:
+        profiling.write_chrome_trace(events, trace_json)
+    return counts
+
+
+def main_batch():
+    parser = argparse.ArgumentParser(description="Solve every Thermometers instance of a folder or glob.")
+    parser.add_argument("instances", help="folder (e.g. examplesthermo/) or glob (e.g. 'examplesthermo*/*.txt')")
+    parser.add_argument("-o", "--output", default=os.path.join(main.SOLUTIONS_DIR, "batch.jsonl"),
+                        help="JSONL results file (default: solutions/batch.jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=1, help="instances sent to a worker at a time")
+    parser.add_argument("--solver", choices=["clingo", "native"], default="clingo", help="solver backend")
+    parser.add_argument("--cache", metavar="DIR", default=None, help="use the solution cache in DIR")
+    parser.add_argument("--draw", metavar="DIR", default=None, help="also render every solution to DIR/sol_<name>.png")
+    parser.add_argument("--trace", metavar="FILE", default=None,
+                        help="save the stages of every instance as one Chrome trace (JSON)")
+    parser.add_argument("--budget", default=None, metavar="SECONDS",
+                        help="time limit of each search in seconds, or 'auto' (deadline.BUDGETS by grid size)")
+    args = parser.parse_args()
+    budget = args.budget
+    if budget == "auto":
+        budget = deadline.BUDGETS
+    elif budget is not None:
+        try:
+            budget = float(budget)
+        except ValueError:
+            parser.error("--budget needs a number of seconds or 'auto'")
+
+    instances = find_instances(args.instances)
+    if not instances:
+        print(f"No instances found: {args.instances}")
+        sys.exit(1)
+
+    out_dir = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(out_dir, exist_ok=True)
+
+    if args.draw is not None:
+        os.makedirs(args.draw, exist_ok=True)
+
+    start = time.perf_counter()
+    counts = run_batch(instances, args.output, workers=args.workers, chunksize=args.chunksize,
+                       solver=args.solver, draw_dir=args.draw, cache_dir=args.cache, trace_json=args.trace,
+                       budget=budget)
+    elapsed = time.perf_counter() - start
+
+    print(f"Solved {len(instances)} instances in {elapsed:.2f}s")
+    for status, k in sorted(counts.items()):
+        print(f"  {status}: {k}")
+    print(f"Results saved: {args.output}")
+    if args.trace is not None:
+        print(f"Trace saved: {args.trace}")
+
+
+if __name__ == "__main__":
+    main_batch()
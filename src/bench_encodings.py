@@ -0,0 +1,88 @@
+import os
+import glob
+import time
+import argparse
+import tempfile
+import clingo
+
+import main
+import generate
+
+# Benchmark of the ASP encodings in main.ENCODINGS (thermo.lp vs thermo_level.lp):
+# ground program size (atoms, rules, bodies) and encode/ground/solve times per instance.
+#
+#   python src/bench_encodings.py examplesthermo/ --sizes 50 100 200
+
+
+def measure(data, encoding):
+    program, encoder = main.ENCODINGS[encoding]
+    t0 = time.perf_counter()
+    facts = encoder(data)
+    t1 = time.perf_counter()
+
+    ctl = clingo.Control()
+    ctl.configuration.solve.models = "2"
+    ctl.load(program)
+    ctl.add("base", [], "\n".join(facts))
+    ctl.ground([("base", [])])
+    t2 = time.perf_counter()
+
+    nummodels = 0
+    with ctl.solve(yield_=True) as handle:
+        for model in handle:
+            nummodels += 1
+    t3 = time.perf_counter()
+
+    lp = ctl.statistics["problem"]["lp"]
+    return {
+        "models": nummodels,
+        "atoms": int(lp["atoms"]),
+        "rules": int(lp["rules"]),
+        "bodies": int(lp["bodies"]),
+        "encode": t1 - t0,
+        "ground": t2 - t1,
+        "solve": t3 - t2,
+    }
+
+
+def bench(name, data, encodings):
+    print(f"{name} ({data['n']}x{data['n']}, {len(data['thermometers'])} thermometers)")
+    for encoding in encodings:
+        m = measure(data, encoding)
+        print(f"  {encoding:<7} atoms={m['atoms']:>9} rules={m['rules']:>9} bodies={m['bodies']:>9}"
+              f"  encode={m['encode']:.3f}s ground={m['ground']:.3f}s solve={m['solve']:.3f}s"
+              f"  models={m['models']}")
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Compare ground size and solve time of the ASP encodings.")
+    parser.add_argument("instances", nargs="*", default=[os.path.join(main.BASE_DIR, "..", "examplesthermo")],
+                        help="instance files or folders (default: examplesthermo/)")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[50, 100],
+                        help="sizes of the generated grids (default: 50 100)")
+    parser.add_argument("--density", type=float, default=0.5, help="fill density of the generated grids")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated grids")
+    parser.add_argument("--encodings", nargs="*", default=sorted(main.ENCODINGS), choices=sorted(main.ENCODINGS))
+    args = parser.parse_args()
+
+    files = []
+    for arg in args.instances:
+        files.extend(sorted(glob.glob(os.path.join(arg, "*.txt"))) if os.path.isdir(arg) else [arg])
+
+    for input_txt in files:
+        data = main.parse_instance(input_txt)
+        if data is None:
+            print(f"{input_txt}: could not be parsed")
+            continue
+        bench(os.path.basename(input_txt), data, args.encodings)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            input_txt = os.path.join(tmp, f"gen{n}.txt")
+            with open(input_txt, "w", encoding="utf-8") as f:
+                f.write(generate.random_instance(n, args.density, args.seed))
+            bench(f"generated {n}", main.parse_instance(input_txt), args.encodings)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,114 @@
+import os
+import json
+import math
+import time
+import argparse
+import tempfile
+import clingo
+
+import main
+import encode
+import generate
+
+# Scaling benchmark of every pipeline stage on generated grids:
+# parse, encode, ground, solve (first model), decode (model -> solution grid) and render.
+#
+#   python src/bench_pipeline.py --sizes 10 50 100 200 500 1000 [--curved]
+#
+# For each stage it prints the time per size and the scaling exponent k of time ~ cells^k
+# (least squares on the log-log points), to see which stage breaks down first.
+
+STAGES = ["parse", "encode", "ground", "solve", "decode", "render"]
+
+
+def time_stages(input_txt, render_max):
+    times = {}
+    t0 = time.perf_counter()
+    puzzle = main.parse_instance(input_txt, as_puzzle=True)
+    t1 = time.perf_counter()
+    times["parse"] = t1 - t0
+
+    facts = encode.encode_puzzle(puzzle)
+    t2 = time.perf_counter()
+    times["encode"] = t2 - t1
+
+    ctl = clingo.Control()
+    ctl.load(main.THERMO)
+    ctl.add("base", [], "\n".join(facts))
+    ctl.ground([("base", [])])
+    t3 = time.perf_counter()
+    times["ground"] = t3 - t2
+
+    grid = None
+    with ctl.solve(yield_=True) as handle:
+        for model in handle:
+            t4 = time.perf_counter()
+            times["solve"] = t4 - t3
+            fills = []
+            for atom in model.symbols(shown=True):
+                if atom.name == "fill" and len(atom.arguments) == 2:
+                    fills.append((atom.arguments[0].number, atom.arguments[1].number))
+            grid = main.solution_grid(puzzle.n, fills)
+            times["decode"] = time.perf_counter() - t4
+            break
+
+    if grid is not None and puzzle.n <= render_max:
+        import drawthermo
+        t5 = time.perf_counter()
+        drawthermo.render_puzzle(puzzle, grid)
+        times["render"] = time.perf_counter() - t5
+    return times
+
+
+def exponent(points):
+    # Slope of log(time) against log(cells), None with less than two points
+    points = [(math.log(x), math.log(y)) for x, y in points if y > 0]
+    if len(points) < 2:
+        return None
+    mx = sum(x for x, _ in points) / len(points)
+    my = sum(y for _, y in points) / len(points)
+    sxx = sum((x - mx) ** 2 for x, _ in points)
+    if sxx == 0:
+        return None
+    return sum((x - mx) * (y - my) for x, y in points) / sxx
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description="Time every pipeline stage on generated grids of growing size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 25, 50, 100, 200], help="grid sizes")
+    parser.add_argument("--curved", action="store_true", help="generate curved thermometers")
+    parser.add_argument("--density", type=float, default=0.5, help="fill density of the generated grids")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per size (the fastest one is kept)")
+    parser.add_argument("--render-max", type=int, default=100, help="largest size that is rendered")
+    parser.add_argument("--json", default=None, help="also save the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            input_txt = os.path.join(tmp, f"gen{n}.txt")
+            with open(input_txt, "w", encoding="utf-8") as f:
+                f.write(generate.random_instance(n, args.density, args.seed,
+                                                 turn_prob=0.3 if args.curved else 0.0))
+            best = {}
+            for _ in range(args.repeat):
+                for stage, t in time_stages(input_txt, args.render_max).items():
+                    best[stage] = min(t, best.get(stage, t))
+            results.append({"n": n, "cells": n * n, "times": best})
+            print(f"{n:>5}x{n:<5} " + " ".join(
+                f"{stage}={best[stage]:.4f}s" if stage in best else f"{stage}=-" for stage in STAGES))
+
+    print("\nScaling (time ~ cells^k):")
+    for stage in STAGES:
+        k = exponent([(res["cells"], res["times"][stage]) for res in results if stage in res["times"]])
+        print(f"  {stage:<7} k = {k:.2f}" if k is not None else f"  {stage:<7} k = -")
+
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"curved": args.curved, "density": args.density, "results": results}, f, indent=2)
+        print(f"\nResults saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import hashlib
+
+# On-disk solution cache, content-addressed.
+#
+# The key is a hash of the parsed grid plus the row/column targets, taken in a canonical
+# orientation: the instance is transformed by the 8 symmetries of the square (rotations and
+# reflections, remapping arrows, bulbs and turns, and swapping/reversing the targets) and the
+# smallest of the 8 texts is hashed. Mirrored or rotated copies of a puzzle share one entry.
+#
+# Each entry is cache/<key>.json with the status and the solution in canonical orientation.
+# The modification time of an entry is its last use, which gives LRU eviction when the cache
+# holds more than max_entries entries. The entries are only counted (one scan of the folder)
+# when the cache is opened and when it overflows; eviction then goes down to EVICT_TO of
+# max_entries, so that the next puts do not scan the folder again.
+
+CACHE_VERSION = 1
+EVICT_TO = 0.9  # fraction of max_entries kept by an eviction
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "..", "cache")
+
+DIRS = {'^': (-1, 0), 'v': (1, 0), '>': (0, 1), '<': (0, -1)}
+BULB_DIRS = {'U': (-1, 0), 'D': (1, 0), 'R': (0, 1), 'L': (0, -1)}
+# Turns as in step_1_optional.CORNER_TURNS, described by the two neighbours they connect
+CORNER_ARMS = {
+    '0': frozenset([(-1, 0), (0, 1)]),   # └ : up and right
+    '1': frozenset([(1, 0), (0, 1)]),    # ┏ : down and right
+    '2': frozenset([(1, 0), (0, -1)]),   # ┐ : down and left
+    '3': frozenset([(-1, 0), (0, -1)]),  # ┘ : up and left
+}
+
+# The 8 symmetries as (transpose, flip rows, flip columns), applied in that order
+SYMMETRIES = [(t, fr, fc) for t in (False, True) for fr in (False, True) for fc in (False, True)]
+
+
+def move_dir(d, sym):
+    transpose, flip_rows, flip_cols = sym
+    dr, dc = d
+    if transpose:
+        dr, dc = dc, dr
+    return (-dr if flip_rows else dr, -dc if flip_cols else dc)
+
+def move_cell(n, r, c, sym):
+    transpose, flip_rows, flip_cols = sym
+    if transpose:
+        r, c = c, r
+    return (n - 1 - r if flip_rows else r, n - 1 - c if flip_cols else c)
+
+def symbol_map(sym):
+    # old symbol -> symbol after the transformation
+    table = {}
+    for symbols in (DIRS, BULB_DIRS):
+        inverse = {d: ch for ch, d in symbols.items()}
+        for ch, d in symbols.items():
+            table[ch] = inverse[move_dir(d, sym)]
+    inverse = {arms: ch for ch, arms in CORNER_ARMS.items()}
+    for ch, arms in CORNER_ARMS.items():
+        table[ch] = inverse[frozenset(move_dir(d, sym) for d in arms)]
+    return table
+
+SYMBOL_MAPS = [symbol_map(sym) for sym in SYMMETRIES]
+
+
+def transform(grid, col_targets, row_targets, k):
+    # Apply symmetry k to the instance. Returns (grid lines, column targets, row targets)
+    sym = SYMMETRIES[k]
+    table = SYMBOL_MAPS[k]
+    n = len(grid)
+    out = [[None] * n for _ in range(n)]
+    for r in range(n):
+        for c in range(n):
+            rr, cc = move_cell(n, r, c, sym)
+            ch = grid[r][c]
+            out[rr][cc] = table.get(ch, ch)
+
+    transpose, flip_rows, flip_cols = sym
+    rows, cols = (list(col_targets), list(row_targets)) if transpose else (list(row_targets), list(col_targets))
+    if flip_rows:
+        rows.reverse()
+    if flip_cols:
+        cols.reverse()
+    return ["".join(row) for row in out], cols, rows
+
+def canonical(grid, col_targets, row_targets):
+    # Returns (key, k): the hash of the canonical form and the symmetry that produces it
+    best = None
+    best_k = 0
+    for k in range(len(SYMMETRIES)):
+        lines, cols, rows = transform(grid, col_targets, row_targets, k)
+        text = "\n".join(lines) + "\n" + " ".join(map(str, cols)) + "\n" + " ".join(map(str, rows))
+        if best is None or text < best:
+            best = text
+            best_k = k
+    key = hashlib.sha256(f"v{CACHE_VERSION}\n{best}".encode("utf-8")).hexdigest()
+    return key, best_k
+
+def to_canonical(solution, k):
+    # Solution grid of the instance -> solution grid in canonical orientation
+    n = len(solution)
+    out = [["."] * n for _ in range(n)]
+    for r in range(n):
+        for c in range(n):
+            rr, cc = move_cell(n, r, c, SYMMETRIES[k])
+            out[rr][cc] = solution[r][c]
+    return ["".join(row) for row in out]
+
+def from_canonical(solution, k):
+    # Solution grid in canonical orientation -> solution grid of the instance
+    n = len(solution)
+    out = [["."] * n for _ in range(n)]
+    for r in range(n):
+        for c in range(n):
+            rr, cc = move_cell(n, r, c, SYMMETRIES[k])
+            out[r][c] = solution[rr][cc]
+    return ["".join(row) for row in out]
+
+
+def instance_of(data):
+    # (grid lines, column targets, row targets) of the JSON data or of a puzzle.Puzzle
+    if isinstance(data, dict):
+        return data["grid"], data["col_targets"], data["row_targets"]
+    return data.grid_lines(), data.col_targets.tolist(), data.row_targets.tolist()
+
+
+class SolutionCache:
+    def __init__(self, path=CACHE_DIR, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(path, exist_ok=True)
+        self.count = len(self.entries())  # entries in the folder (other processes may add more)
+
+    def entry_path(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def get(self, data):
+        # Returns (status, solution grid or None) for the JSON data (or Puzzle), or None on a miss
+        key, k = canonical(*instance_of(data))
+        entry_path = self.entry_path(key)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(entry_path)  # mark as recently used
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        grid = entry["grid"]
+        return entry["status"], (from_canonical(grid, k) if grid is not None else None)
+
+    def put(self, data, status, grid):
+        # status: UNIQUE, MULTIPLE or UNSATISFIABLE; grid: solution lines (None if unsatisfiable)
+        key, k = canonical(*instance_of(data))
+        entry = {"status": status, "grid": to_canonical(grid, k) if grid is not None else None}
+        tmp_path = self.entry_path(key) + f".{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        new = not os.path.exists(self.entry_path(key))
+        os.replace(tmp_path, self.entry_path(key))  # atomic, safe with concurrent processes
+        self.count += new
+        if self.count > self.max_entries:
+            self.evict()
+
+    def entries(self):
+        return [e for e in os.scandir(self.path) if e.name.endswith(".json")]
+
+    def evict(self):
+        # Remove the least recently used entries above max_entries, down to EVICT_TO of it
+        entries = self.entries()
+        self.count = len(entries)
+        if len(entries) <= self.max_entries:
+            return
+        keep = int(self.max_entries * EVICT_TO)
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for e in entries[:len(entries) - keep]:
+            try:
+                os.remove(e.path)
+                self.evictions += 1
+            except FileNotFoundError:  # already removed by another process
+                pass
+            self.count -= 1
+
+    def stats(self):
+        entries = self.entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(e.stat().st_size for e in entries),
+        }
+
+
+if __name__ == "__main__":
+    # python src/cache.py [cache_dir] -> print the size of the cache
+    cache = SolutionCache(sys.argv[1] if len(sys.argv) > 1 else CACHE_DIR)
+    stats = cache.stats()
+    print(f"{stats['entries']} entries, {stats['bytes']} bytes in {cache.path}")
@@ -0,0 +1,82 @@
+import clingo
+
+# Time-budgeted solving with clingo.
+#
+# solve() runs ctl.solve(async_=True), waits at most `budget` seconds and cancels the search
+# when the time is over. It then still returns what is known:
+#   - the models found so far (one model without the second search means "solution found,
+#     uniqueness not proven");
+#   - the fill/2 atoms decided by propagation alone (true or false at decision level 0,
+#     recorded by RootAssignment), i.e. the cells that every solution has to agree on;
+#   - the clingo statistics of the interrupted search.
+#
+# Default budgets depend on the grid size: BUDGETS is a list of (largest n, seconds), the last
+# entry (n = None) covers everything larger. parse_budgets() reads "10:1,30:5,*:120".
+
+BUDGETS = [(10, 1.0), (30, 5.0), (100, 30.0), (None, 120.0)]
+
+
+def default_budget(n, budgets=BUDGETS):
+    for max_n, seconds in budgets:
+        if max_n is None or n <= max_n:
+            return seconds
+    return None
+
+
+def parse_budgets(text):
+    # "10:1,30:5,*:120" -> [(10, 1.0), (30, 5.0), (None, 120.0)]
+    budgets = []
+    for item in text.split(","):
+        size, seconds = item.split(":")
+        budgets.append((None if size.strip() == "*" else int(size), float(seconds)))
+    return budgets
+
+
+class RootAssignment:
+    # Propagator that only watches the search: at every fixpoint on decision level 0 it records
+    # which fill/2 atoms are already true or false. It never adds anything.
+    def __init__(self):
+        self.cells = {}    # solver literal -> [(r, c), ...] (equivalent atoms share a literal)
+        self.filled = set()
+        self.empty = set()
+
+    def init(self, init):
+        for atom in init.symbolic_atoms.by_signature("fill", 2):
+            r, c = (arg.number for arg in atom.symbol.arguments)
+            self.cells.setdefault(init.solver_literal(atom.literal), []).append((r, c))
+        init.check_mode = clingo.PropagatorCheckMode.Fixpoint
+
+    def check(self, control):
+        assignment = control.assignment
+        if assignment.decision_level > 0:
+            return
+        for lit, cells in self.cells.items():
+            if assignment.is_true(lit):
+                self.filled.update(cells)
+            elif assignment.is_false(lit):
+                self.empty.update(cells)
+
+
+def solve(ctl, budget, on_model):
+    # Solve (after grounding) for at most budget seconds, calling on_model for every model.
+    # A RootAssignment, if any, must have been registered before.
+    # Returns True if the search finished, False if it was cancelled.
+    with ctl.solve(on_model=on_model, async_=True) as handle:
+        finished = handle.wait(budget)
+        if not finished:
+            handle.cancel()
+        handle.get()
+    return finished
+
+
+def partial_result(root, stats):
+    # What is known about an interrupted search (see above). Cells without a fill/2 atom
+    # (outside every thermometer, or emptied by the grounder) are not listed.
+    decided = root.filled | root.empty
+    cells = {cell for group in root.cells.values() for cell in group}
+    return {
+        "filled": sorted(root.filled),
+        "empty": sorted(root.empty),
+        "undecided": sorted(cells - decided),
+        "stats": stats,
+    }
@@ -22,7 +22,7 @@ nummodels=0
 with ctl.solve(yield_=True) as handle:
   for model in handle:
       if nummodels>0: print("Warning: more than 1 model"); break
-      for atom in model.symbols(atoms=True):
+      for atom in model.symbols(shown=True):
           if (atom.name=="dim" 
           and len(atom.arguments)==1 
           and atom.arguments[0].type is clingo.SymbolType.Number):
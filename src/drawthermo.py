@@ -1,6 +1,22 @@
-import pygame
-import sys
 import os
+import sys
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PICS_DIR = os.path.join(BASE_DIR, "..", "pics")
+
+name={'R':'r', 'U':'u', 'L':'l', 'D':'d', '>':'rend', '<':'lend', '^':'uend', 'v':'dend'}
+
+max_window_size = 900
+img_scale = 0.9
+line_color = (200, 200, 200)
+
+# Sprite atlas: cellsize -> {sprite name: scaled image}. Every sprite is loaded from pics/
+# and scaled once per cell size, and then reused by every render of the process.
+_atlas = {}
+_fonts = {}
 
 def windowdata(lits):
     params={'h':200,'w':400,'caption':''}
@@ -20,105 +36,166 @@ def getvalue(dict,attr,default):
     if attr in dict: return dict[attr]
     return default
 
-### Main program
-
-if len(sys.argv)<2:
-    print("drawthermo.py <domainfile.txt> <solution_file.txt>")
-    sys.exit()
-
-# Opening files
-f = open(sys.argv[1], "r", encoding="utf-8-sig")
-domain = [line.strip() for line in f if line.strip() != ""]
-f.close()
-f = open(sys.argv[2], "r", encoding="utf-8-sig")
-filled = [line.strip().replace(" ", "") for line in f if line.strip() != ""]
-f.close()
-
-# Extract size and targets
-col_targets = [int(x) for x in domain[-2].split()]
-row_targets = [int(x) for x in domain[-1].split()]
-domain = domain[:-2]
-n = len(domain)
-
-# Check
-if len(filled) != n or any(len(r) != n for r in filled):
-    print("Error: solution and domain dimensions do not match.")
-    sys.exit(1)
-
-name={'R':'r', 'U':'u', 'L':'l', 'D':'d', '>':'rend', '<':'lend', '^':'uend', 'v':'dend'}
-
-# Visualization
-pygame.init()
-
-max_window_size = 900
-cellsize = max(40, min(80, max_window_size // (n + 2)))
-margin_left = int(cellsize * 1)
-margin_top = int(cellsize * 1)
-padding = int(cellsize * 0.6)
-img_scale = 0.9
-screen_w = margin_left + n * cellsize + padding
-screen_h = margin_top + n * cellsize + padding
-screen = pygame.display.set_mode([screen_w, screen_h])
-pygame.display.set_caption("Thermometers puzzle")
-screen.fill(pygame.Color("white"))
-
-# Font for row/column numbers
-font = pygame.font.SysFont("arial", max(20, cellsize // 2), bold=True)
-
-### Draw thermometers
-for i in range(n):
-    for j in range(n):
-        ch = domain[i][j]
-        if ch == '>' and j < n - 1 and domain[i][j+1] == '>': s = 'hor'
-        elif ch == '<' and j > 0 and domain[i][j-1] == '<': s = 'hor'
-        elif ch == '^' and i > 0 and domain[i-1][j] == '^': s = 'vert'
-        elif ch == 'v' and i < n - 1 and domain[i+1][j] == 'v': s = 'vert'
-        else: s = name.get(ch, None)
-        
-        # Load and scale image
-        if filled[i][j] == 'x': s = "red-" + s
-        img = pygame.image.load("pics/" + s + ".png").convert_alpha()
+def read_domain(path):
+    # ASCII (or .thb, see instance_bin.py) instance -> (grid lines, column targets, row targets)
+    if path.endswith(".thb"):
+        import instance_bin
+        puzzle = instance_bin.load(path)
+        if puzzle is None:
+            sys.exit(1)
+        return puzzle.grid_lines(), puzzle.col_targets.tolist(), puzzle.row_targets.tolist()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        domain = [line.strip() for line in f if line.strip() != ""]
+    col_targets = [int(x) for x in domain[-2].split()]
+    row_targets = [int(x) for x in domain[-1].split()]
+    return domain[:-2], col_targets, row_targets
+
+def read_solution(path):
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return [line.strip().replace(" ", "") for line in f if line.strip() != ""]
+
+def cell_size(n):
+    return max(40, min(80, max_window_size // (n + 2)))
+
+def sprite_name(domain, i, j):
+    n = len(domain)
+    ch = domain[i][j]
+    if ch == '>' and j < n - 1 and domain[i][j+1] == '>': return 'hor'
+    elif ch == '<' and j > 0 and domain[i][j-1] == '<': return 'hor'
+    elif ch == '^' and i > 0 and domain[i-1][j] == '^': return 'vert'
+    elif ch == 'v' and i < n - 1 and domain[i+1][j] == 'v': return 'vert'
+    return name.get(ch, None)
+
+def sprite(s, cellsize):
+    # Scaled image of pics/<s>.png, from the atlas (loaded on first use)
+    sprites = _atlas.setdefault(cellsize, {})
+    img = sprites.get(s)
+    if img is None:
+        img = pygame.image.load(os.path.join(PICS_DIR, s + ".png"))
+        if pygame.display.get_surface() is not None:
+            img = img.convert_alpha()
         scaled = int(cellsize * img_scale)
         img = pygame.transform.smoothscale(img, (scaled, scaled))
-        offset = (cellsize - scaled) // 2
-        x = margin_left + j * cellsize + offset
-        y = margin_top + i * cellsize + offset
-        screen.blit(img, [x, y])
-
-### Draw grid lines
-line_color = (200, 200, 200)
-for i in range(n + 1):
-    y = margin_top + i * cellsize
-    pygame.draw.line(screen, line_color,
-                     (margin_left, y), (margin_left + n * cellsize, y), 2)
-for j in range(n + 1):
-    x = margin_left + j * cellsize
-    pygame.draw.line(screen, line_color,
-                     (x, margin_top), (x, margin_top + n * cellsize), 2)
-    
-### Draw row and column targets
-# Columns (top)
-for j, val in enumerate(col_targets):
-    text = font.render(str(val), True, (0,0,0))
-    rect = text.get_rect(center=(margin_left + j * cellsize + cellsize/2, margin_top / 2))
-    screen.blit(text, rect)
-
-# Rows (left)
-for i, val in enumerate(row_targets):
-    text = font.render(str(val), True, (0,0,0))
-    rect = text.get_rect(center=(margin_left / 2, margin_top + i * cellsize + cellsize/2))
-    screen.blit(text, rect)
-
-### Save and display image
-pygame.display.flip()
-out_name = os.path.splitext(os.path.basename(sys.argv[1]))[0]
-out_path = f"solutions/sol_{out_name}.png"
-pygame.image.save(screen, out_path)
-print(f"Image saved to {out_path}")
-
-done=False
-while not done:
-    for evento in pygame.event.get():
-        if evento.type == pygame.QUIT:
-            done = True
-pygame.quit()
\ No newline at end of file
+        sprites[s] = img
+    return img
+
+def font(size):
+    if size not in _fonts:
+        _fonts[size] = pygame.font.SysFont("arial", size, bold=True)
+    return _fonts[size]
+
+def render(domain, filled, col_targets, row_targets):
+    # Draw the puzzle with its solution and return the surface. No window and no event loop
+    # are needed, so it can be called many times per process (batch jobs).
+    # domain/filled: grid lines of the instance and of the solution ('x' = filled).
+    if not pygame.font.get_init():
+        pygame.font.init()
+
+    n = len(domain)
+    cellsize = cell_size(n)
+    margin_left = int(cellsize * 1)
+    margin_top = int(cellsize * 1)
+    padding = int(cellsize * 0.6)
+    screen_w = margin_left + n * cellsize + padding
+    screen_h = margin_top + n * cellsize + padding
+    screen = pygame.Surface((screen_w, screen_h))
+    screen.fill(pygame.Color("white"))
+
+    ### Draw thermometers
+    scaled = int(cellsize * img_scale)
+    offset = (cellsize - scaled) // 2
+    for i in range(n):
+        for j in range(n):
+            s = sprite_name(domain, i, j)
+            x = margin_left + j * cellsize + offset
+            y = margin_top + i * cellsize + offset
+            if s is None:
+                # no picture for this symbol (e.g. the turns 0-3 of curved thermometers)
+                color = (220, 40, 40) if filled[i][j] == 'x' else (170, 170, 170)
+                pygame.draw.rect(screen, color, (x, y, scaled, scaled), border_radius=scaled // 3)
+                continue
+            if filled[i][j] == 'x': s = "red-" + s
+            screen.blit(sprite(s, cellsize), [x, y])
+
+    ### Draw grid lines
+    for i in range(n + 1):
+        y = margin_top + i * cellsize
+        pygame.draw.line(screen, line_color,
+                         (margin_left, y), (margin_left + n * cellsize, y), 2)
+    for j in range(n + 1):
+        x = margin_left + j * cellsize
+        pygame.draw.line(screen, line_color,
+                         (x, margin_top), (x, margin_top + n * cellsize), 2)
+
+    ### Draw row and column targets
+    text_font = font(max(20, cellsize // 2))
+    # Columns (top)
+    for j, val in enumerate(col_targets):
+        text = text_font.render(str(val), True, (0,0,0))
+        rect = text.get_rect(center=(margin_left + j * cellsize + cellsize/2, margin_top / 2))
+        screen.blit(text, rect)
+
+    # Rows (left)
+    for i, val in enumerate(row_targets):
+        text = text_font.render(str(val), True, (0,0,0))
+        rect = text.get_rect(center=(margin_left / 2, margin_top + i * cellsize + cellsize/2))
+        screen.blit(text, rect)
+
+    return screen
+
+def render_to_file(domain, filled, col_targets, row_targets, out_path):
+    pygame.image.save(render(domain, filled, col_targets, row_targets), out_path)
+
+def render_puzzle(puzzle, filled, out_path=None):
+    # render() for a puzzle.Puzzle; also saved to out_path if it is given
+    image = render(puzzle.grid_lines(), filled, puzzle.col_targets.tolist(), puzzle.row_targets.tolist())
+    if out_path is not None:
+        pygame.image.save(image, out_path)
+    return image
+
+def main():
+    args = [a for a in sys.argv[1:] if a != "--headless"]
+    headless = len(args) != len(sys.argv) - 1
+    if len(args)<2:
+        print("drawthermo.py <domainfile.txt> <solution_file.txt> [--headless]")
+        sys.exit()
+
+    # Opening files
+    domain, col_targets, row_targets = read_domain(args[0])
+    filled = read_solution(args[1])
+    n = len(domain)
+
+    # Check
+    if len(filled) != n or any(len(r) != n for r in filled):
+        print("Error: solution and domain dimensions do not match.")
+        sys.exit(1)
+
+    out_name = os.path.splitext(os.path.basename(args[0]))[0]
+    out_path = f"solutions/sol_{out_name}.png"
+
+    if headless:
+        render_to_file(domain, filled, col_targets, row_targets, out_path)
+        print(f"Image saved to {out_path}")
+        return
+
+    # Visualization
+    pygame.init()
+    image = render(domain, filled, col_targets, row_targets)
+    screen = pygame.display.set_mode(image.get_size())
+    pygame.display.set_caption("Thermometers puzzle")
+    screen.blit(image, (0, 0))
+
+    ### Save and display image
+    pygame.display.flip()
+    pygame.image.save(screen, out_path)
+    print(f"Image saved to {out_path}")
+
+    done=False
+    while not done:
+        for evento in pygame.event.get():
+            if evento.type == pygame.QUIT:
+                done = True
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,10 @@
 import os
 import json
 import sys
+import numpy as np
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python src/encode.py examplesthermo/dom__.json facts/domain__.lp")
-        sys.exit(1)
-    json_file = sys.argv[1]
-    out_lp = sys.argv[2]
-    output_dir = os.path.join(".", "facts")
-    os.makedirs(output_dir, exist_ok=True)
-
-    with open(json_file, "r", encoding="utf-8") as f: 
-        data = json.load(f)
-
+def encode(data):
+    # Build the list of ASP facts (strings) from the JSON data
     n = data["n"]  # size of the grid
     grid = data["grid"] 
     bulbs = data["bulbs"]  # [{"r", "c", "dr", "dc"}, {...}, ...]
@@ -29,8 +20,14 @@ def main():
     for path in thermos: 
         for node in path: 
             cells.add( (node["r"], node["c"]) )
+    # cells already decided by presolve.py: filled ones stay cells with a fill/2 fact,
+    # empty ones are left out (a cell that is not in cell/2 cannot be filled)
+    fixed_fill = [(node["r"], node["c"]) for node in data.get("fixed_fill", [])]
+    cells.update(fixed_fill)
     for (r,c) in sorted(cells):  #funcionaria igual si no estuviera el sorted, es solo para ordenar la salida (legibilidad)
         facts.append(f"cell({r},{c}).")
+    for (r,c) in sorted(fixed_fill):
+        facts.append(f"fill({r},{c}).")
             
     # bulb/2. find every bulb
     for bulb in bulbs:
@@ -52,10 +49,163 @@ def main():
     for r, k in enumerate(row_targets, start=0):
         facts.append(f"row_target({r},{k}).")
 
+    return facts
+
+def encode_puzzle(puzzle):
+    # The same facts as encode(), from a puzzle.Puzzle (flat arrays, no dictionary per cell)
+    n = puzzle.n
+    cells = puzzle.cells
+    starts = puzzle.offsets[:-1]
+
+    facts = [f"dim({n})."]
+    rs, cs = np.divmod(np.flatnonzero(puzzle.thermo_of >= 0), n)
+    facts += [f"cell({r},{c})." for r, c in zip(rs.tolist(), cs.tolist())]
+
+    rs, cs = np.divmod(cells[starts], n)
+    facts += [f"bulb({r},{c})." for r, c in zip(rs.tolist(), cs.tolist())]
+
+    # prev/4 for every cell that is not a bulb, with the cell before it in the same thermometer
+    follows = np.ones(len(cells), dtype=bool)
+    follows[starts] = False
+    idx = np.flatnonzero(follows)
+    rs, cs = np.divmod(cells[idx], n)
+    prs, pcs = np.divmod(cells[idx - 1], n)
+    facts += [f"prev({r},{c},{pr},{pc})." for r, c, pr, pc in zip(rs.tolist(), cs.tolist(), prs.tolist(), pcs.tolist())]
+
+    facts += [f"col_target({c},{k})." for c, k in enumerate(puzzle.col_targets.tolist())]
+    facts += [f"row_target({r},{k})." for r, k in enumerate(puzzle.row_targets.tolist())]
+    return facts
+
+def encode_thermo_level_puzzle(puzzle):
+    # The same facts as encode_thermo_level(), from a puzzle.Puzzle
+    n = puzzle.n
+    facts = [f"dim({n})."]
+    lengths = np.diff(puzzle.offsets)
+    thermo = np.repeat(np.arange(len(lengths)), lengths)
+    pos = np.arange(len(puzzle.cells)) - puzzle.offsets[thermo]
+    rs, cs = np.divmod(puzzle.cells, n)
+    bounds = puzzle.offsets.tolist()
+    tcells = [f"tcell({t},{i},{r},{c})." for t, i, r, c in zip(thermo.tolist(), pos.tolist(), rs.tolist(), cs.tolist())]
+    for t, L in enumerate(lengths.tolist()):
+        facts.append(f"thermo({t},{L}).")
+        facts += tcells[bounds[t]:bounds[t + 1]]
+
+    facts += [f"col_target({c},{k})." for c, k in enumerate(puzzle.col_targets.tolist())]
+    facts += [f"row_target({r},{k})." for r, k in enumerate(puzzle.row_targets.tolist())]
+    return facts
+
+# Facts of a puzzle.Puzzle as integer arrays, without going through text:
+# [(predicate, rows), ...] where rows is a k x arity array, one row per fact.
+# add_puzzle_facts() adds them to a clingo.Control through its backend (nothing to parse),
+# write_facts_stream() writes them to a .lp file chunk by chunk (no list of all the facts).
+FACT_CHUNK = 1 << 16
+
+def puzzle_fact_arrays(puzzle, encoding="cell"):
+    # The facts of encode_puzzle() (encoding "cell") or encode_thermo_level_puzzle() ("thermo")
+    n = puzzle.n
+    cells = puzzle.cells
+    starts = puzzle.offsets[:-1]
+    arrays = [("dim", np.array([[n]]))]
+    if encoding == "cell":
+        arrays.append(("cell", np.column_stack(np.divmod(np.flatnonzero(puzzle.thermo_of >= 0), n))))
+        arrays.append(("bulb", np.column_stack(np.divmod(cells[starts], n))))
+        follows = np.ones(len(cells), dtype=bool)
+        follows[starts] = False
+        idx = np.flatnonzero(follows)
+        arrays.append(("prev", np.column_stack(np.divmod(cells[idx], n) + np.divmod(cells[idx - 1], n))))
+    else:
+        lengths = np.diff(puzzle.offsets)
+        thermo = np.repeat(np.arange(len(lengths)), lengths)
+        arrays.append(("thermo", np.column_stack((np.arange(len(lengths)), lengths))))
+        arrays.append(("tcell", np.column_stack((thermo, np.arange(len(cells)) - puzzle.offsets[thermo])
+                                                + np.divmod(cells, n))))
+    arrays.append(("col_target", np.column_stack((np.arange(n), puzzle.col_targets))))
+    arrays.append(("row_target", np.column_stack((np.arange(n), puzzle.row_targets))))
+    return arrays
+
+def count_facts(arrays):
+    return sum(len(rows) for _, rows in arrays)
+
+def add_puzzle_facts(ctl, arrays):
+    # Add the facts of puzzle_fact_arrays() to ctl (before ctl.ground)
+    import clingo
+    Function = clingo.Function
+    numbers = [clingo.Number(i) for i in range(int(max(rows.max(initial=0) for _, rows in arrays)) + 1)]
+    with ctl.backend() as backend:
+        add_atom = backend.add_atom
+        add_rule = backend.add_rule
+        for name, rows in arrays:
+            for row in rows.tolist():
+                add_rule([add_atom(Function(name, [numbers[x] for x in row]))])
+
+def iter_fact_text(arrays, chunk=FACT_CHUNK):
+    # The facts as text, FACT_CHUNK facts (one string) at a time
+    for name, rows in arrays:
+        pattern = name + "(" + ",".join(["%d"] * rows.shape[1]) + ").\n"
+        for start in range(0, len(rows), chunk):
+            yield "".join([pattern % tuple(row) for row in rows[start:start + chunk].tolist()])
+
+def write_facts_stream(arrays, out_lp, chunk=FACT_CHUNK):
+    with open(out_lp, 'w', encoding='utf-8') as f:
+        for text in iter_fact_text(arrays, chunk):
+            f.write(text)
+
+def encode_thermo_level(data):
+    # Facts for thermo_level.lp: thermometers with their ordered cells instead of cell/prev
+    n = data["n"]
+    thermos = data["thermometers"]
+
+    facts = []
+    facts.append(f"dim({n}).")
+
+    # thermo/2: thermometer id and length. tcell/4: position I (0 = bulb) of thermometer T
+    for t, path in enumerate(thermos):
+        facts.append(f"thermo({t},{len(path)}).")
+        for i, node in enumerate(path):
+            facts.append(f"tcell({t},{i},{node['r']},{node['c']}).")
+
+    for c, k in enumerate(data["col_targets"]):
+        facts.append(f"col_target({c},{k}).")
+    for r, k in enumerate(data["row_targets"]):
+        facts.append(f"row_target({r},{k}).")
+
+    return facts
+
+def write_facts(facts, out_lp):
     with open(out_lp, 'w', encoding='utf-8') as f:
         for line in facts:
             f.write(line + "\n")
 
+def main():
+    args = [a for a in sys.argv[1:] if a != "--thermo-level"]
+    thermo_level = len(args) != len(sys.argv) - 1
+    if len(args) != 2:
+        print("Usage: python src/encode.py examplesthermo/dom__.json|.thb facts/domain__.lp [--thermo-level]")
+        sys.exit(1)
+    json_file = args[0]
+    out_lp = args[1]
+    output_dir = os.path.join(".", "facts")
+    os.makedirs(output_dir, exist_ok=True)
+
+    if json_file.endswith(".thb"):  # binary instance (instance_bin.py)
+        import instance_bin
+        puzzle = instance_bin.load(json_file)
+        if puzzle is None:
+            sys.exit(1)
+        arrays = puzzle_fact_arrays(puzzle, "thermo" if thermo_level else "cell")
+        write_facts_stream(arrays, out_lp)
+        print(f"File saved to {out_lp} with {count_facts(arrays)} facts.")
+        return
+
+    with open(json_file, "r", encoding="utf-8") as f: 
+        data = json.load(f)
+
+    if thermo_level:  # facts for thermo_level.lp
+        facts = encode_thermo_level(data)
+    else:
+        facts = encode(data)
+    write_facts(facts, out_lp)
+
     print(f"File saved to {out_lp} with {len(facts)} facts.")
 
 if __name__ == "__main__":
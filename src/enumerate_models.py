@@ -0,0 +1,122 @@
+import sys
+import time
+import argparse
+import clingo
+
+import main
+import portfolio
+
+# Streaming model enumeration (for puzzle-quality analysis: how many solutions, which ones).
+#
+# main.solve stops after two models and decodes every atom of the model into a grid. Here:
+#   - the solutions are yielded one by one (a generator), as bitsets: a Python int with bit
+#     r*n + c set when cell (r, c) is filled;
+#   - a model is decoded from its shown symbols only (fill/2 and dim/1 of #show), through
+#     an index symbol -> bit built once from the ground program;
+#   - count_models() only counts: no model is ever handed to Python, clingo's own statistics
+#     give the number.
+# Solutions are projected on the shown atoms, so two models that only differ in auxiliary
+# atoms count once.
+
+
+def ground(facts, program=main.THERMO, limit=0, threads=1, configuration="auto"):
+    # Control with the program grounded, enumerating up to limit models (0 = all)
+    ctl = clingo.Control(portfolio.control_args(threads, configuration) + ["--project=show"])
+    portfolio.configure(ctl, threads)
+    ctl.configuration.solve.models = str(limit)
+    if program is not None:
+        ctl.load(program)
+    ctl.add("base", [], "\n".join(facts))
+    ctl.ground([("base", [])])
+    return ctl
+
+
+def cell_index(ctl):
+    # (n, {fill(R,C) symbol: 1 << (R*n + C)}) from the ground program
+    n = 0
+    for atom in ctl.symbolic_atoms.by_signature("dim", 1):
+        n = atom.symbol.arguments[0].number
+    masks = {}
+    for atom in ctl.symbolic_atoms.by_signature("fill", 2):
+        r, c = (arg.number for arg in atom.symbol.arguments)
+        masks[atom.symbol] = 1 << (r * n + c)
+    return n, masks
+
+
+def iter_models(ctl, masks):
+    # Yield the bitset of every model (lazily: the search continues when the next one is asked)
+    get = masks.get
+    with ctl.solve(yield_=True) as handle:
+        for model in handle:
+            bits = 0
+            for symbol in model.symbols(shown=True):
+                bits |= get(symbol, 0)
+            yield bits
+
+
+def enumerate_models(facts, program=main.THERMO, limit=0, threads=1, configuration="auto"):
+    # Ground and yield the solutions as bitsets. The first value yielded is n.
+    ctl = ground(facts, program, limit, threads, configuration)
+    n, masks = cell_index(ctl)
+    yield n
+    yield from iter_models(ctl, masks)
+
+
+def count_models(facts, program=main.THERMO, limit=0, threads=1, configuration="auto"):
+    # Number of solutions (at most limit, 0 = all) without decoding any model
+    ctl = ground(facts, program, limit, threads, configuration)
+    ctl.solve()
+    return int(ctl.statistics["summary"]["models"]["enumerated"])
+
+
+def bits_to_cells(bits, n):
+    # [(r, c), ...] filled in a bitset, as the fills of main.solve
+    cells = []
+    while bits:
+        low = bits & -bits
+        k = low.bit_length() - 1
+        cells.append(divmod(k, n))
+        bits ^= low
+    return cells
+
+
+def bits_to_grid(bits, n):
+    # The rows of main.solution_grid
+    text = format(bits, f"0{n * n}b")[::-1].translate(str.maketrans("01", ".x"))
+    return [text[r * n:(r + 1) * n] for r in range(n)]
+
+
+def facts_of(input_txt, encoding="cell"):
+    # (program, facts) of an instance, or (program, None) if it could not be parsed
+    program, _ = main.ENCODINGS[encoding]
+    puzzle = main.parse_instance(input_txt, as_puzzle=True)
+    if puzzle is None:
+        return program, None
+    return program, main.PUZZLE_ENCODERS[encoding](puzzle)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enumerate or count the solutions of a Thermometers instance.")
+    parser.add_argument("input_txt", help="ASCII or .thb instance")
+    parser.add_argument("-n", "--limit", type=int, default=0, help="stop after this many solutions (0 = all)")
+    parser.add_argument("--count", action="store_true", help="only print the number of solutions")
+    parser.add_argument("--print", action="store_true", help="print the grid of every solution")
+    parser.add_argument("--encoding", choices=sorted(main.ENCODINGS), default="cell", help="ASP encoding")
+    args = parser.parse_args()
+
+    program, facts = facts_of(args.input_txt, args.encoding)
+    if facts is None:
+        sys.exit(1)
+    start = time.perf_counter()
+    if args.count:
+        count = count_models(facts, program, args.limit)
+    else:
+        count = 0
+        models = enumerate_models(facts, program, args.limit)
+        n = next(models)
+        for bits in models:
+            count += 1
+            if args.print:
+                print(f"Solution {count}:")
+                print("\n".join(bits_to_grid(bits, n)))
+    print(f"{count} solution(s) in {time.perf_counter() - start:.3f}s")
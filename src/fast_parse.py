@@ -0,0 +1,189 @@
+import sys
+import time
+import argparse
+import numpy as np
+
+import step_1
+import step_1_optional
+
+# Linear-time parser for large grids (straight and curved), with NumPy.
+#
+# The grid is loaded as an n x n uint8 array. A "state" k*4 + d is "leaving cell k in direction d"
+# (0 up, 1 down, 2 right, 3 left). For every state the successor state is computed at once
+# with array operations: the neighbour in direction d continues the thermometer if it is an arrow
+# pointing in d, or a turn (CORNER_TURNS) that accepts d as entry direction. Then all
+# thermometers are traced together, one step of every thermometer per iteration, so the total
+# work is linear in the number of cells. Overlaps and orphan cells are checked with bincount.
+#
+# The thermometers are returned in CSR form: the cells of thermometer t (flat indices r*n + c,
+# from the bulb) are cells[offsets[t]:offsets[t+1]]. They are in the same order as in
+# step_1.thermos / step_1_optional.build_thermos (bulbs in row-major order).
+
+DIRS = [(-1, 0), (1, 0), (0, 1), (0, -1)]
+DIR_INDEX = {d: i for i, d in enumerate(DIRS)}
+
+# Per byte value: bulb direction, or -1
+BULB_DIR = np.full(256, -1, dtype=np.int8)
+for ch, d in step_1_optional.BULBS.items():
+    BULB_DIR[ord(ch)] = DIR_INDEX[d]
+
+# Per byte value and entry direction: exit direction, or -1 if the cell cannot be entered that way
+EXIT_DIR = np.full((256, 4), -1, dtype=np.int8)
+for ch, d in step_1_optional.ARROWS.items():
+    EXIT_DIR[ord(ch), DIR_INDEX[d]] = DIR_INDEX[d]
+for ch, turns in step_1_optional.CORNER_TURNS.items():
+    for d_in, d_out in turns.items():
+        EXIT_DIR[ord(ch), DIR_INDEX[d_in]] = DIR_INDEX[d_out]
+
+# Symbols that must belong to a thermometer
+IS_SYMBOL = np.zeros(256, dtype=bool)
+for ch in list(step_1_optional.BULBS) + list(step_1_optional.ARROWS) + list(step_1_optional.CORNER_TURNS):
+    IS_SYMBOL[ord(ch)] = True
+
+
+def read_grid(path):
+    # Returns (grid lines, n x n uint8 array, col_sums, row_sums), or None on error
+    with open(path, "r", encoding="utf-8") as f:
+        return grid_from_text(f.read())
+
+
+def grid_from_text(content):
+    # read_grid() for the contents of an ASCII file
+    lines = [line.strip() for line in content.splitlines()]
+    if len(lines) < 3:
+        print("Error: the input is too short.")
+        return None
+    try:
+        col_sums = [int(x) for x in lines[-2].split()]
+        row_sums = [int(x) for x in lines[-1].split()]
+    except ValueError:
+        print("Error: the last two lines must contain space-separated integers.")
+        return None
+
+    n = len(col_sums)
+    grid_lines = lines[:-2]
+    if n != len(row_sums) or len(grid_lines) != n:
+        print(f"Error: expected {n} grid rows and {n} row sums, got {len(grid_lines)} and {len(row_sums)}")
+        return None
+    for r, row in enumerate(grid_lines):
+        if len(row) != n:
+            print(f"Error: row {r} does not have {n} columns")
+            return None
+
+    # Other characters than ASCII are not symbols of the puzzle: they become '?'
+    text = "".join(grid_lines).encode("ascii", "replace")
+    arr = np.frombuffer(text, dtype=np.uint8).reshape(n, n)
+    return grid_lines, arr, col_sums, row_sums
+
+
+# (cells that can move in direction d, their neighbours) as slices of the n x n grid
+MOVES = [
+    ((slice(1, None), slice(None)), (slice(None, -1), slice(None))),   # up
+    ((slice(None, -1), slice(None)), (slice(1, None), slice(None))),   # down
+    ((slice(None), slice(None, -1)), (slice(None), slice(1, None))),   # right
+    ((slice(None), slice(1, None)), (slice(None), slice(None, -1))),   # left
+]
+
+
+def successors(arr):
+    # succ[k*4 + d]: state after leaving cell k in direction d, or -1 if the thermometer ends there
+    n = arr.shape[0]
+    index = np.arange(n * n, dtype=np.int64).reshape(n, n)
+    succ = np.full((n, n, 4), -1, dtype=np.int64)
+    for d, (src, dst) in enumerate(MOVES):
+        out = EXIT_DIR[arr[dst], d]
+        succ[src + (d,)] = np.where(out >= 0, index[dst] * 4 + out, -1)
+    return succ.reshape(-1)
+
+
+def trace(arr):
+    # Returns (bulbs, offsets, cells) as arrays (see above), or None on overlap or orphan cells.
+    # bulbs[t] is the flat index of the bulb of thermometer t.
+    n = arr.shape[0]
+    flat = arr.reshape(-1)
+    bulbs = np.flatnonzero(BULB_DIR[flat] >= 0)
+    succ = successors(arr)
+
+    # All thermometers advance together; the loop runs (longest thermometer) times
+    state = bulbs * 4 + BULB_DIR[flat[bulbs]]
+    owner = np.arange(len(bulbs), dtype=np.int64)
+    steps_cells = [bulbs]
+    steps_owner = [owner]
+    while len(state):
+        state = succ[state]
+        alive = state >= 0
+        state = state[alive]
+        owner = owner[alive]
+        steps_cells.append(state // 4)
+        steps_owner.append(owner)
+
+    all_cells = np.concatenate(steps_cells)
+    all_owner = np.concatenate(steps_owner)
+
+    counts = np.bincount(all_cells, minlength=n * n)
+    overlap = np.flatnonzero(counts > 1)
+    if len(overlap):
+        r, c = divmod(int(overlap[0]), n)
+        print(f"Error: thermos paths overlap at cell ({r}, {c})")
+        return None
+    orphan = np.flatnonzero(IS_SYMBOL[flat] & (counts == 0))
+    if len(orphan):
+        r, c = divmod(int(orphan[0]), n)
+        print(f"Error: cell {r},{c} with symbol '{chr(flat[orphan[0]])}' not connected to any bulb")
+        return None
+
+    # Stable sort by thermometer: cells stay in path order (they were collected step by step)
+    order = np.argsort(all_owner, kind="stable")
+    cells = all_cells[order].astype(np.int32)
+    offsets = np.zeros(len(bulbs) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(all_owner, minlength=len(bulbs)), out=offsets[1:])
+    return bulbs, offsets, cells
+
+
+def parse_arrays(path, text=None):
+    # Returns (grid lines, uint8 array, col_sums, row_sums, bulbs, offsets, cells), or None on error.
+    # With text, that is parsed instead of reading the file at path.
+    grid_data = read_grid(path) if text is None else grid_from_text(text)
+    if grid_data is None:
+        return None
+    grid_lines, arr, col_sums, row_sums = grid_data
+    traced = trace(arr)
+    if traced is None:
+        return None
+    return (grid_lines, arr, col_sums, row_sums) + traced
+
+
+def to_json_data(parsed):
+    # The same dictionary as step_1.load_instance / step_1_optional.load_instance
+    grid_lines, arr, col_sums, row_sums, bulbs, offsets, cells = parsed
+    n = arr.shape[0]
+    flat = arr.reshape(-1)
+    found_bulbs = [(k // n, k % n) + DIRS[d] for k, d in zip(bulbs.tolist(), BULB_DIR[flat[bulbs]].tolist())]
+    rs, cs = np.divmod(cells, n)
+    coords = list(zip(rs.tolist(), cs.tolist()))
+    bounds = offsets.tolist()
+    thermo_paths = [coords[bounds[t]:bounds[t + 1]] for t in range(len(bulbs))]
+    return step_1.to_json_data([list(row) for row in grid_lines], col_sums, row_sums, found_bulbs, thermo_paths)
+
+
+def load_instance(path):
+    # Read the ASCII file (straight or curved) and return the JSON data, or None on error
+    parsed = parse_arrays(path)
+    if parsed is None:
+        return None
+    return to_json_data(parsed)
+
+
+if __name__ == "__main__":
+    # python src/fast_parse.py instance.txt -> parse time and number of thermometers
+    parser = argparse.ArgumentParser(description="Parse a Thermometers instance with the NumPy parser.")
+    parser.add_argument("input_txt", help="ASCII instance")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    parsed = parse_arrays(args.input_txt)
+    if parsed is None:
+        sys.exit(1)
+    t1 = time.perf_counter()
+    n = parsed[1].shape[0]
+    print(f"Grid {n}x{n} with {len(parsed[4])} thermometers, parsed in {t1 - t0:.3f}s")
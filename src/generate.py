@@ -0,0 +1,129 @@
+import sys
+import random
+import argparse
+
+from step_1_optional import CORNER_TURNS
+
+# Random instance generator, in the same ASCII format as examplesthermo/ (straight) and
+# examplesthermo_curved/ (with turns 0-3): n lines of n symbols, then the column sums and
+# the row sums. Every cell belongs to a thermometer (single-cell thermometers fill the gaps),
+# and the sums come from a hidden fill, so the instance always has a solution.
+#
+# The last cell of a thermometer is always an arrow, so the parsers stop exactly there
+# (the next cell can never continue it: its symbol would point back to this thermometer).
+
+ARROWS = {(-1, 0): '^', (1, 0): 'v', (0, 1): '>', (0, -1): '<'}
+BULBS = {(-1, 0): 'U', (1, 0): 'D', (0, 1): 'R', (0, -1): 'L'}
+# (entry direction, exit direction) -> turn symbol, from CORNER_TURNS
+CORNERS = {(d_in, d_out): ch for ch, turns in CORNER_TURNS.items() for d_in, d_out in turns.items()}
+
+
+def random_thermos(n, rnd, max_len=None, turn_prob=0.0, free_cells=None):
+    # Thermometers covering the whole n x n grid (or only free_cells, a list of (r, c), if given).
+    # Returns a list of paths [(r, c), ...]
+    # With turn_prob = 0 they are straight; otherwise each step turns with that probability
+    # (or when going straight is blocked).
+    if max_len is None:
+        max_len = n
+    if free_cells is None:
+        cells = list(range(n * n))
+        used = bytearray(n * n)
+    else:
+        cells = [r * n + c for (r, c) in free_cells]
+        used = bytearray(b"\x01" * (n * n))
+        for k in cells:
+            used[k] = 0
+    rnd.shuffle(cells)
+    dirs = list(ARROWS)
+    paths = []
+
+    def free(r, c):
+        return 0 <= r < n and 0 <= c < n and not used[r * n + c]
+
+    for start in cells:
+        if used[start]:
+            continue
+        r, c = divmod(start, n)
+        dr, dc = rnd.choice(dirs)
+        length = rnd.randint(1, max_len)
+        path = [(r, c)]
+        used[start] = 1
+        while len(path) < length:
+            if turn_prob > 0 and (rnd.random() < turn_prob or not free(r + dr, c + dc)):
+                turns = [(dc, dr), (-dc, -dr)]  # the two perpendicular directions
+                rnd.shuffle(turns)
+                for (tr, tc) in turns:
+                    if free(r + tr, c + tc):
+                        dr, dc = tr, tc
+                        break
+            if not free(r + dr, c + dc):
+                break
+            r += dr
+            c += dc
+            path.append((r, c))
+            used[r * n + c] = 1
+        paths.append(path)
+    return paths
+
+
+def hidden_fill(paths, density, rnd):
+    # Fill length of each thermometer, about `density` of the cells in total
+    return [sum(1 for _ in path if rnd.random() < density) for path in paths]
+
+
+def to_ascii(n, paths, lengths, rnd=random):
+    # Grid lines plus column and row sums of the filled prefixes
+    grid = [[None] * n for _ in range(n)]
+    for path in paths:
+        r, c = path[0]
+        if len(path) == 1:
+            grid[r][c] = rnd.choice(list(BULBS.values()))  # any direction works for a lone bulb
+            continue
+        moves = [(path[i][0] - path[i-1][0], path[i][1] - path[i-1][1]) for i in range(1, len(path))]
+        grid[r][c] = BULBS[moves[0]]
+        for i in range(1, len(path)):
+            r, c = path[i]
+            d_in = moves[i - 1]
+            d_out = moves[i] if i < len(moves) else d_in
+            grid[r][c] = ARROWS[d_in] if d_out == d_in else CORNERS[(d_in, d_out)]
+
+    col_sums = [0] * n
+    row_sums = [0] * n
+    for path, L in zip(paths, lengths):
+        for (r, c) in path[:L]:
+            row_sums[r] += 1
+            col_sums[c] += 1
+
+    lines = ["".join(row) for row in grid]
+    lines.append(" ".join(str(k) for k in col_sums))
+    lines.append(" ".join(str(k) for k in row_sums))
+    return "\n".join(lines) + "\n"
+
+
+def random_instance(n, density=0.5, seed=None, max_len=None, turn_prob=0.0):
+    # ASCII text of a random n x n instance (curved if turn_prob > 0)
+    rnd = random.Random(seed)
+    paths = random_thermos(n, rnd, max_len, turn_prob)
+    lengths = hidden_fill(paths, density, rnd)
+    return to_ascii(n, paths, lengths, rnd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a random Thermometers instance.")
+    parser.add_argument("n", type=int, help="grid size (n x n)")
+    parser.add_argument("--density", type=float, default=0.5, help="fraction of filled cells (default 0.5)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--max-len", type=int, default=None, help="maximum thermometer length (default n)")
+    parser.add_argument("--curved", action="store_true", help="thermometers with turns (0-3)")
+    parser.add_argument("--turn-prob", type=float, default=0.3, help="probability of a turn per step with --curved")
+    parser.add_argument("-o", "--output", default=None, help="output .txt file (default: stdout)")
+    args = parser.parse_args()
+
+    text = random_instance(args.n, args.density, args.seed, args.max_len,
+                           args.turn_prob if args.curved else 0.0)
+    if args.output is None:
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Instance saved to {args.output}")
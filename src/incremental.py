@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+
+# Incremental pipeline: main.py only redoes the stages whose inputs changed.
+#
+# Every artifact of run() (JSON, .thb, facts, solution, PNG) has a manifest entry with the key
+# of the inputs it was made from: the content hash of the instance file, the hash of the
+# source files of the stage (step_1.py, encode.py, thermo.lp, ...), the clingo version and the
+# solver settings. A stage is skipped when the key is the same and the artifact still has the
+# content hash recorded in its entry (a file edited or deleted by hand is made again).
+#
+# Each entry is manifest/<hash of the artifact path>.json. Artifacts and entries are written
+# to a temporary file and renamed (atomic), so concurrent runs never see half-written files:
+# two processes that make the same artifact both write the same content, and an entry whose
+# artifact was meanwhile replaced by another run no longer matches its hash (stale, made again).
+
+MANIFEST_VERSION = 1
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_DIR = os.path.join(BASE_DIR, "..", "manifest")
+
+# Source files of every stage (names in src/): the modules each stage imports, and main.py,
+# which runs them, decodes the models and writes the artifacts
+PARSE_SOURCES = ["main.py", "fast_parse.py", "step_1.py", "step_1_optional.py", "puzzle.py", "instance_bin.py"]
+SOLVE_SOURCES = PARSE_SOURCES + ["encode.py", "presolve.py", "native_solver.py", "portfolio.py", "deadline.py",
+                                 "warmstart.py", "cache.py", "profiling.py", "thermo.lp", "thermo_level.lp"]
+DRAW_SOURCES = ["drawthermo.py"]
+
+_versions = {}  # source file -> content hash, once per process
+
+
+def file_hash(path):
+    # sha256 of the content of a file, or None if it does not exist
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def source_versions(names):
+    # {name: content hash} of source files in src/
+    for name in names:
+        if name not in _versions:
+            _versions[name] = file_hash(os.path.join(BASE_DIR, name))
+    return {name: _versions[name] for name in names}
+
+
+def stage_key(sources, **inputs):
+    # Hash of the stage inputs: the versions of its sources and any JSON-serializable values
+    text = json.dumps({"v": MANIFEST_VERSION, "sources": source_versions(sources), **inputs}, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    def __init__(self, path=MANIFEST_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def entry_path(self, artifact):
+        name = hashlib.sha256(os.path.abspath(artifact).encode("utf-8")).hexdigest()
+        return os.path.join(self.path, name + ".json")
+
+    def entry(self, artifact):
+        try:
+            with open(self.entry_path(artifact), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def fresh(self, artifact, key):
+        # The entry of artifact if it was made with this key and is unchanged since, else None
+        entry = self.entry(artifact)
+        if entry is None or entry["key"] != key or file_hash(artifact) != entry["hash"]:
+            return None
+        return entry
+
+    def record(self, artifact, key, digest, **extra):
+        entry = {"artifact": os.path.abspath(artifact), "key": key, "hash": digest, "time": time.time(), **extra}
+        entry_path = self.entry_path(artifact)
+        tmp_path = entry_path + f".{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, entry_path)
+
+    @contextmanager
+    def produce(self, artifact, key, **extra):
+        # with manifest.produce(path, key) as tmp: write the artifact to tmp (same extension).
+        # On success tmp replaces the artifact and the entry is recorded; if nothing was
+        # written, or on an error, the artifact and its entry are left as they were.
+        root, ext = os.path.splitext(artifact)
+        tmp_path = f"{root}.{os.getpid()}.tmp{ext}"
+        try:
+            yield tmp_path
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        digest = file_hash(tmp_path)
+        if digest is None:
+            return
+        os.replace(tmp_path, artifact)
+        self.record(artifact, key, digest, **extra)
+
+    def entries(self):
+        found = []
+        for e in os.scandir(self.path):
+            if e.name.endswith(".json"):
+                try:
+                    with open(e.path, "r", encoding="utf-8") as f:
+                        found.append(json.load(f))
+                except (OSError, ValueError):  # being replaced by another process
+                    pass
+        return found
+
+
+if __name__ == "__main__":
+    # python src/incremental.py [manifest_dir] -> list the artifacts and whether they are unchanged
+    manifest = Manifest(sys.argv[1] if len(sys.argv) > 1 else MANIFEST_DIR)
+    entries = sorted(manifest.entries(), key=lambda entry: entry["artifact"])
+    for entry in entries:
+        digest = file_hash(entry["artifact"])
+        state = "missing" if digest is None else "unchanged" if digest == entry["hash"] else "changed"
+        print(f"{state:<10} {time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['time']))}  {entry['artifact']}")
+    print(f"{len(entries)} artifacts in {manifest.path}")
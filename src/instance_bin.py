@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import struct
+import argparse
+import numpy as np
+
+import fast_parse
+from puzzle import Puzzle
+
+# Compact binary instance format (.thb), the fast alternative to the JSON of step_1.py.
+#
+#   header   magic, version, n, number of thermometers T, number of thermometer cells M
+#   grid     n*n uint8, the ASCII symbols row by row
+#   targets  n int32 column targets, n int32 row targets
+#   offsets  T+1 int64
+#   cells    M int32, flat cell indices r*n + c
+#
+# The thermometers are stored in CSR form as in fast_parse.trace: the cells of thermometer t
+# (from the bulb) are cells[offsets[t]:offsets[t+1]]. Every block starts at a multiple of 8 bytes.
+# load() memory-maps the file and returns a puzzle.Puzzle on top of it; the JSON of step_1.py
+# stays available as a debug export (Puzzle.to_json_data).
+
+MAGIC = b"THRMBIN\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+
+
+def padded(size):
+    return (size + 7) // 8 * 8
+
+
+def save(path, puzzle):
+    blocks = [
+        np.ascontiguousarray(puzzle.grid).reshape(-1),
+        puzzle.col_targets.astype("<i4"),
+        puzzle.row_targets.astype("<i4"),
+        puzzle.offsets.astype("<i8"),
+        puzzle.cells.astype("<i4"),
+    ]
+    tmp_path = path + f".{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, puzzle.n, puzzle.num_thermos, len(puzzle.cells)))
+        for block in blocks:
+            data = block.tobytes()
+            f.write(data + b"\0" * (padded(len(data)) - len(data)))
+    os.replace(tmp_path, path)
+
+
+def load(path):
+    # Puzzle on the memory-mapped file, or None if the file is not a .thb instance
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        print(f"Error: {path} is too short.")
+        return None
+    magic, version, n, num_thermos, num_cells = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        print(f"Error: {path} is not a version {VERSION} .thb instance.")
+        return None
+    expected = HEADER.size + sum(padded(size) for size in (n * n, 4 * n, 4 * n, 8 * (num_thermos + 1), 4 * num_cells))
+    actual = os.path.getsize(path)
+    if actual != expected:
+        print(f"Error: {path} has {actual} bytes, its header describes {expected} (truncated or damaged file).")
+        return None
+
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+    pos = HEADER.size
+
+    def block(dtype, count):
+        nonlocal pos
+        size = np.dtype(dtype).itemsize * count
+        arr = mm[pos:pos + size].view(dtype)
+        pos += padded(size)
+        return arr
+
+    grid = block(np.uint8, n * n).reshape(n, n)
+    col_targets = block("<i4", n)
+    row_targets = block("<i4", n)
+    offsets = block("<i8", num_thermos + 1)
+    cells = block("<i4", num_cells)
+    # a damaged file of the right size: offsets must cut cells into thermometers, cells be in the grid
+    if offsets[0] != 0 or offsets[-1] != num_cells or (np.diff(offsets) < 0).any():
+        print(f"Error: {path} has invalid thermometer offsets (damaged file).")
+        return None
+    if num_cells and (cells.min() < 0 or cells.max() >= n * n):
+        print(f"Error: {path} has cell indices outside the {n}x{n} grid (damaged file).")
+        return None
+    return Puzzle(grid, col_targets, row_targets, offsets, cells)
+
+
+if __name__ == "__main__":
+    # python src/instance_bin.py instance.txt instance.thb [--json instance.json]
+    parser = argparse.ArgumentParser(description="Convert an ASCII Thermometers instance to the .thb format.")
+    parser.add_argument("input_txt", help="ASCII instance")
+    parser.add_argument("output_thb", help="binary instance to write")
+    parser.add_argument("--json", default=None, help="also export the JSON data (debugging)")
+    args = parser.parse_args()
+
+    parsed = fast_parse.parse_arrays(args.input_txt)
+    if parsed is None:
+        sys.exit(1)
+    puzzle = Puzzle.from_parsed(parsed)
+    save(args.output_thb, puzzle)
+    print(f"Instance saved to {args.output_thb} ({os.path.getsize(args.output_thb)} bytes)")
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(puzzle.to_json_data(), f, indent=2, ensure_ascii=False)
+        print(f"JSON saved to {args.json}")
@@ -1,105 +1,562 @@
 import os
 import sys
-import subprocess
+import json
+import argparse
+import contextlib
 import clingo
 
+import fast_parse
+import instance_bin
+from puzzle import Puzzle
+import encode
+import native_solver
+import presolve
+import cache as solution_cache
+import profiling
+import portfolio
+import deadline
+import warmstart
+import incremental
+from profiling import stage
+
 # --- CONFIGURATION ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 EXAMPLES_DIR = os.path.join(BASE_DIR, "..", "examplesthermo")
 FACTS_DIR = os.path.join(BASE_DIR, "..", "facts")
 SOLUTIONS_DIR = os.path.join(BASE_DIR, "..", "solutions")
 
-STEP1 = os.path.join(BASE_DIR, "step_1.py")
-ENCODE = os.path.join(BASE_DIR, "encode.py")
 THERMO = os.path.join(BASE_DIR, "thermo.lp")
-DRAW = os.path.join(BASE_DIR, "drawthermo.py")
+THERMO_LEVEL = os.path.join(BASE_DIR, "thermo_level.lp")
+# Solver settings written by tune.py, loaded automatically when it exists
+TUNING_FILE = os.path.join(BASE_DIR, "..", "solver_config.json")
 
-# --- ENSURE FOLDERS EXIST ---
-for folder in [FACTS_DIR, SOLUTIONS_DIR]:
-    os.makedirs(folder, exist_ok=True)
+# ASP encodings: name -> (program, function that builds its facts from the JSON data)
+ENCODINGS = {
+    "cell": (THERMO, encode.encode),                           # fill/2 choice + prev/4
+    "thermo": (THERMO_LEVEL, encode.encode_thermo_level),      # one fill level per thermometer
+}
+# The same facts from a puzzle.Puzzle
+PUZZLE_ENCODERS = {"cell": encode.encode_puzzle, "thermo": encode.encode_thermo_level_puzzle}
 
-# --- MAIN ---
-if len(sys.argv) < 2:
-    print("Usage: python src/main.py examplesthermo/domXX.txt")
-    sys.exit(1)
-
-input_txt = sys.argv[1]
-if not os.path.exists(input_txt):
-    print(f"Input file not found: {input_txt}")
-    sys.exit(1)
-
-# File base names
-base_name = os.path.splitext(os.path.basename(input_txt))[0]
-json_path = os.path.join(EXAMPLES_DIR, f"{base_name}.json")
-facts_path = os.path.join(FACTS_DIR, f"{base_name}.lp")
-output_txt = os.path.join(SOLUTIONS_DIR, f"solution_{base_name}.txt")
-
-print("Starting full Thermometers pipeline...")
-print("-----------------------------------------")
-
-
-print("Step 1:\nGenerating JSON instance...")
-input_name = os.path.splitext(os.path.basename(input_txt))[0]
-subprocess.run(["python", STEP1], input=f"{input_name}\n{base_name}.json\n".encode(), check=True)
-if not os.path.exists(json_path):
-    print("JSON file not generated. Aborting.")
-    sys.exit(1)
-print(f"JSON created: {json_path}")
-
-print("\nStep 2: \nEncoding to ASP facts...")
-subprocess.run(["python", ENCODE, json_path, facts_path], check=True)
-if not os.path.exists(facts_path):
-    print("Facts file not generated. Aborting.")
-    sys.exit(1)
-print(f"Facts created: {facts_path}")
-
-
-print("\nStep 3: \Solving with Clingo (Python module)...")
-
-ctl = clingo.Control()
-ctl.load(THERMO)
-ctl.load(facts_path)
-ctl.ground([("base", [])])
-
-size = 0
-fills = []
-nummodels = 0
-
-with ctl.solve(yield_=True) as handle:
-    for model in handle:
-        if nummodels > 0:
-            print("MORE THAN ONE MODEL FOUND!")
-            break
-        for atom in model.symbols(atoms=True):
+
+# --- PIPELINE STEPS (importable) ---
+def parse_instance(input_txt, as_puzzle=False):
+    # Read the instance and return its data in memory (None on error).
+    # ASCII files (straight or curved) are parsed by fast_parse (NumPy, linear time), which gives
+    # the same JSON data as step_1 / step_1_optional. With as_puzzle=True, or for a .thb file
+    # (instance_bin.py), the result is a puzzle.Puzzle instead.
+    if input_txt.endswith(".thb"):
+        return instance_bin.load(input_txt)
+    if as_puzzle:
+        parsed = fast_parse.parse_arrays(input_txt)
+        return Puzzle.from_parsed(parsed) if parsed is not None else None
+    return fast_parse.load_instance(input_txt)
+
+
+def solve(facts, program=THERMO, *, timer=None, threads=1, configuration="auto", budget=None, partial=None,
+          tuning=None, hint=None, stats=None):
+    # Ground the program (thermo.lp by default) together with the facts (no .lp file needed) and solve.
+    # facts is a list of strings, or a function that adds them to the clingo.Control itself
+    # (e.g. through its backend, see encode.add_puzzle_facts).
+    # Returns (size, fills, nummodels); nummodels == 2 means more than one model.
+    # The solver options after program are keyword-only.
+    # With a profiling.StageTimer, the ground/solve/decode stages and ctl.statistics are recorded.
+    # threads > 1 races that many differently configured solvers (portfolio.py).
+    # budget: time limit of the search in seconds (deadline.py). If it runs out, the dictionary
+    # `partial` gets "timed_out": True and what propagation decided; nummodels then counts the
+    # models found before the interruption. Without `partial` a timeout raises TimeoutError, so
+    # that it cannot be taken for an unsatisfiable instance (nummodels == 0).
+    # tuning: settings of tune.py for thermo.lp ("configuration", "heuristic" and the "program"
+    # with its #heuristic directives); its configuration replaces the configuration argument.
+    # hint: program of warmstart.hint_program (a previous solution as preferred decisions).
+    # stats: dictionary that receives profiling.clingo_stats of the search.
+    heuristic = None
+    if tuning is not None:
+        configuration = tuning.get("configuration") or configuration
+        heuristic = tuning.get("heuristic")
+    if hint is not None:
+        heuristic = "Domain"
+    with stage(timer, "ground"):
+        ctl = clingo.Control(portfolio.control_args(threads, configuration, heuristic))
+        portfolio.configure(ctl, threads)
+        ctl.configuration.solve.models = "2"  # 2 models at most, to detect non-unique puzzles
+        if callable(facts):  # before the program, so the grounder knows the atoms when it reads it
+            facts(ctl)
+        if program is not None:  # None: the encoding is already one of the facts
+            ctl.load(program)
+        if not callable(facts):
+            ctl.add("base", [], "\n".join(facts))
+        if tuning is not None and tuning.get("program"):
+            ctl.add("base", [], tuning["program"])
+        if hint is not None:
+            ctl.add("base", [], hint)
+        ctl.ground([("base", [])])
+
+    symbols = []
+    nummodels = 0
+
+    if budget is not None:
+        root = deadline.RootAssignment()
+        if partial is not None:  # the propagator is only needed for the partial result
+            ctl.register_propagator(root)
+        models = []
+        with stage(timer, "solve"):
+            finished = deadline.solve(ctl, budget, lambda model: models.append(model.symbols(shown=True)))
+        nummodels = min(len(models), 2)
+        symbols = models[0] if models else []
+        if not finished and partial is None:
+            raise TimeoutError(f"no answer within {budget}s")
+        if not finished:
+            partial["timed_out"] = True
+            partial.update(deadline.partial_result(root, profiling.clingo_stats(ctl)))
+    else:
+        with stage(timer, "solve"):
+            with ctl.solve(yield_=True) as handle:
+                for model in handle:
+                    if nummodels > 0:
+                        nummodels += 1
+                        break
+                    symbols = model.symbols(shown=True)
+                    nummodels += 1
+    if timer is not None:
+        timer.record_clingo(ctl)
+    if stats is not None:
+        stats.update(profiling.clingo_stats(ctl))
+
+    size = 0
+    fills = []
+    with stage(timer, "decode"):
+        for atom in symbols:
             if atom.name == "dim" and len(atom.arguments) == 1:
                 size = atom.arguments[0].number
             elif atom.name == "fill" and len(atom.arguments) == 2:
                 fills.append((atom.arguments[0].number, atom.arguments[1].number))
-        nummodels += 1
 
-if nummodels == 0:
-    print("UNSATISFIABLE.")
-    sys.exit(1)
+    return size, fills, nummodels
+
+
+def solution_grid(size, fills):
+    # List of strings ('x' filled, '.' empty), as written in solutions/solution_*.txt
+    grid = [["."] * size for _ in range(size)]
+    for (r, c) in fills:
+        grid[r][c] = "x"
+    return ["".join(row) for row in grid]
+
+
+def read_solution(output_txt):
+    with open(output_txt, "r", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def write_solution(grid, output_txt):
+    with open(output_txt, "w", encoding="utf-8") as f:
+        for row in grid:
+            f.write(row + "\n")
+
+
+def produce(manifest, path, key, **extra):
+    # incremental.Manifest.produce(), or simply the path when there is no manifest
+    return manifest.produce(path, key, **extra) if manifest is not None else contextlib.nullcontext(path)
+
+
+def status_of(nummodels, partial=None):
+    # partial: the dictionary filled by solve() / solve_step() with a budget
+    if partial and partial.get("timed_out"):
+        return "TIMEOUT"
+    return ["UNSATISFIABLE", "UNIQUE", "MULTIPLE"][min(nummodels, 2)]
+
+
+def partial_grid(size, partial):
+    # Like solution_grid, for an interrupted search: 'x' filled, '.' empty, '?' undecided
+    grid = [["."] * size for _ in range(size)]
+    for (r, c) in partial["filled"]:
+        grid[r][c] = "x"
+    for (r, c) in partial["undecided"]:
+        grid[r][c] = "?"
+    return ["".join(row) for row in grid]
+
+
+def solve_step(data, solver="clingo", encoding="cell", *, use_presolve=False, facts_path=None, timer=None,
+               threads=1, configuration="auto", budget=None, partial=None, inject="text", tuning=None,
+               hint=None, compare_hint=False):
+    # Steps 2 and 3 of run(): (size, fills, nummodels) with the chosen solver/encoding.
+    # The options after encoding are keyword-only.
+    # The facts are also written to facts_path if it is given.
+    # data is the JSON data or a puzzle.Puzzle (not with use_presolve)
+    # budget/partial: time limit of the search and partial result, as in solve()
+    # inject "backend" adds the facts of a puzzle.Puzzle through clingo's backend instead of text
+    # tuning: settings of tune.py, only used with the "cell" encoding (thermo.lp)
+    # hint: previous solution grid to start from (clingo only, see warmstart.py); with
+    # compare_hint the instance is solved again without it and both statistics are printed.
+    as_puzzle = isinstance(data, Puzzle)
+    if solver == "native":
+        if facts_path is not None:
+            os.makedirs(FACTS_DIR, exist_ok=True)
+            encode.write_facts(encode.encode_puzzle(data) if as_puzzle else encode.encode(data), facts_path)
+            print(f"Facts created: {facts_path}")
+        print("\nStep 2/3: \nSolving with the native solver...")
+        with stage(timer, "solve"):
+            if as_puzzle:
+                return native_solver.solve_puzzle(data, budget, partial)
+            return native_solver.solve(data, budget, partial)
+    else:
+        program, encoder = ENCODINGS[encoding]
+        if as_puzzle:
+            encoder = PUZZLE_ENCODERS[encoding]
+        if use_presolve:
+            with stage(timer, "presolve"):
+                reduced = presolve.reduce(data)
+            print(presolve.report(data, reduced))
+            if reduced is None:
+                return data["n"], [], 0
+            data = reduced
+        print("\nStep 2: \nEncoding to ASP facts...")
+        if as_puzzle and inject == "backend":
+            with stage(timer, "encode"):
+                arrays = encode.puzzle_fact_arrays(data, encoding)
+            print(f"{encode.count_facts(arrays)} facts (added through the clingo backend).")
+            facts = lambda ctl: encode.add_puzzle_facts(ctl, arrays)
+            if facts_path is not None:
+                os.makedirs(FACTS_DIR, exist_ok=True)
+                with stage(timer, "facts_write"):
+                    encode.write_facts_stream(arrays, facts_path)
+                print(f"Facts created: {facts_path}")
+        else:
+            with stage(timer, "encode"):
+                facts = encoder(data)
+            print(f"{len(facts)} facts.")
+            if facts_path is not None:
+                os.makedirs(FACTS_DIR, exist_ok=True)
+                with stage(timer, "facts_write"):
+                    encode.write_facts(facts, facts_path)
+                print(f"Facts created: {facts_path}")
+
+        if encoding != "cell":
+            tuning = None
+        n = data.n if as_puzzle else data["n"]
+        if hint is not None and len(hint) != n:
+            print(f"The hint is a {len(hint)}x{len(hint)} grid, not {n}x{n}: ignored.")
+            hint = None
+        hint_text = warmstart.hint_program(hint, encoding) if hint is not None else None
+
+        print("\nStep 3: \nSolving with Clingo (Python module)" + (f", {threads} threads" if threads > 1 else "") +
+              (", starting from the hint..." if hint is not None else "..."))
+        stats = {}
+        options = {"threads": threads, "configuration": configuration, "budget": budget, "tuning": tuning}
+        result = solve(facts, program, timer=timer, partial=partial, hint=hint_text, stats=stats, **options)
+        if hint is not None and compare_hint:
+            without = {}
+            solve(facts, program, partial={}, stats=without, **options)
+            print(warmstart.compare(stats, without))
+        return result
+
+
+def run(input_txt, *, write_json=False, write_facts=False, draw=True, solver="clingo", encoding="cell",
+        use_presolve=False, cache=None, timer=None, write_bin=False, threads=1, configuration="auto", race=None,
+        budget=None, inject="text", tuning=None, hint=None, compare_hint=False, manifest=None):
+    # Full pipeline for one instance. JSON, .thb and facts files are only written on request.
+    # Every option is keyword-only.
+    # input_txt is an ASCII instance or a .thb file (instance_bin.py).
+    # solver is "clingo" or "native" (native_solver.py, no grounding).
+    # encoding is the ASP encoding used with clingo, a key of ENCODINGS.
+    # use_presolve hands clingo only the cells not decided by presolve.py ("cell" encoding).
+    # cache is an optional cache.SolutionCache, looked up before solving.
+    # timer is an optional profiling.StageTimer that records every stage.
+    # threads/configuration: clingo portfolio threads and --configuration (portfolio.py).
+    # race: list of portfolio.RACE_ENTRIES run in separate processes instead of solver/encoding.
+    # budget: time limit of the search in seconds, or a deadline.BUDGETS-like list to pick it
+    # from the grid size. On timeout the known cells are saved to partial_<name>.txt.
+    # inject: how the facts reach clingo, "text" or "backend" (solve_step).
+    # tuning: clingo settings found by tune.py (see load_tuning).
+    # hint: previous solution (grid rows) to warm-start clingo from, or "auto" for the
+    # solution file of this instance if there is one; compare_hint as in solve_step.
+    # manifest: optional incremental.Manifest; the artifacts already made from the same inputs
+    # are not made again (the facts are written while solving: stale facts also solve again).
+    # Returns the solution grid, or None if there is no solution.
+    os.makedirs(SOLUTIONS_DIR, exist_ok=True)
+
+    # File base names
+    base_name = os.path.splitext(os.path.basename(input_txt))[0]
+    json_path = os.path.join(EXAMPLES_DIR, f"{base_name}.json")
+    bin_path = os.path.join(EXAMPLES_DIR, f"{base_name}.thb")
+    facts_path = os.path.join(FACTS_DIR, f"{base_name}.lp")
+    output_txt = os.path.join(SOLUTIONS_DIR, f"solution_{base_name}.txt")
+    partial_txt = os.path.join(SOLUTIONS_DIR, f"partial_{base_name}.txt")
+    image_path = os.path.join(SOLUTIONS_DIR, f"sol_{base_name}.png")
+
+    if hint == "auto":
+        hint = warmstart.read_grid(output_txt)
+        if hint is None:
+            print(f"No previous solution in {output_txt}: solving without hint.")
+
+    write_bin = write_bin and not input_txt.endswith(".thb")
+    keys = {}
+    fresh = set()
+    if manifest is not None:
+        instance = incremental.file_hash(input_txt)
+        options = {"instance": instance, "solver": solver, "encoding": encoding, "presolve": use_presolve}
+        keys["json"] = keys["bin"] = incremental.stage_key(incremental.PARSE_SOURCES, instance=instance)
+        keys["facts"] = incremental.stage_key(incremental.SOLVE_SOURCES, stage="facts", **options)
+        keys["solution"] = incremental.stage_key(incremental.SOLVE_SOURCES, stage="solution", race=race,
+                                                 threads=threads, configuration=configuration, tuning=tuning,
+                                                 clingo=clingo.__version__, **options)
+        for name, path, wanted in (("json", json_path, write_json), ("bin", bin_path, write_bin),
+                                   ("facts", facts_path, write_facts)):
+            if wanted and manifest.fresh(path, keys[name]):
+                fresh.add(name)
+        entry = None
+        if "facts" in fresh or not write_facts:
+            entry = manifest.fresh(output_txt, keys["solution"])
+        if entry is not None:
+            fresh.add("solution")
+            keys["png"] = incremental.stage_key(incremental.DRAW_SOURCES, instance=instance, solution=entry["hash"])
+            if draw and manifest.fresh(image_path, keys["png"]):
+                fresh.add("png")
+            wanted = {name for name, on in (("json", write_json), ("bin", write_bin), ("facts", write_facts),
+                                            ("png", draw)) if on}
+            if wanted <= fresh:
+                print(f"Up to date ({entry['status']}): {output_txt}")
+                return read_solution(output_txt)
+
+    print("Starting full Thermometers pipeline...")
+    print("-----------------------------------------")
+
+    print("Step 1:\nParsing instance...")
+    # The JSON data (a dictionary per thermometer cell) is only built for presolve.py
+    with stage(timer, "parse"):
+        data = parse_instance(input_txt, as_puzzle=not use_presolve)
+    if data is None:
+        print("Instance could not be parsed. Aborting.")
+        return None
+    if use_presolve and isinstance(data, Puzzle):  # .thb input
+        data = data.to_json_data()
+    n = data.n if isinstance(data, Puzzle) else data["n"]
+    if isinstance(data, Puzzle):
+        print(f"Grid {n}x{n} with {data.num_thermos} thermometers.")
+    else:
+        print(f"Grid {n}x{n} with {len(data['thermometers'])} thermometers.")
+    if isinstance(budget, list):
+        budget = deadline.default_budget(n, budget)
+    if write_json and "json" not in fresh:
+        with stage(timer, "json_write"), produce(manifest, json_path, keys.get("json")) as path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data.to_json_data() if isinstance(data, Puzzle) else data, f, indent=2, ensure_ascii=False)
+        print(f"JSON created: {json_path}")
+    if write_bin and "bin" not in fresh:
+        with stage(timer, "bin_write"), produce(manifest, bin_path, keys.get("bin")) as path:
+            instance_bin.save(path, data if isinstance(data, Puzzle) else Puzzle.from_json_data(data))
+        print(f"Binary instance created: {bin_path}")
+
+    hit = None
+    if "solution" in fresh:
+        hit = entry["status"], read_solution(output_txt)
+        print(f"\nStep 2/3: \nSolution up to date ({entry['status']}).")
+    elif cache is not None:
+        with stage(timer, "cache"):
+            hit = cache.get(data)
+        if hit is not None:
+            print(f"\nStep 2/3: \nSolution found in the cache ({hit[0]}).")
+    if hit is not None:
+        status, grid = hit
+    else:
+        if race:
+            print(f"\nStep 2/3: \nRacing {', '.join(race)}...")
+            with stage(timer, "solve"):
+                winner, result = portfolio.race(data, race, threads, timeout=budget)
+            if result is None:
+                print("No portfolio entry answered" + (f" within {budget}s." if budget is not None else ".") +
+                      " Aborting.")
+                return None
+            print(f"Winner: {winner}")
+            size, fills, nummodels = result
+            partial = None
+        else:
+            partial = {}
+            with produce(manifest, facts_path, keys.get("facts")) as path:
+                size, fills, nummodels = solve_step(
+                    data, solver, encoding, use_presolve=use_presolve,
+                    facts_path=path if write_facts and "facts" not in fresh else None, timer=timer,
+                    threads=threads, configuration=configuration, budget=budget, partial=partial, inject=inject,
+                    tuning=tuning, hint=hint, compare_hint=compare_hint)
+        status = status_of(nummodels, partial)
+        with stage(timer, "decode"):
+            grid = solution_grid(size, fills) if nummodels > 0 else None
+        if cache is not None and status != "TIMEOUT":  # a timeout says nothing about the instance
+            with stage(timer, "cache"):
+                cache.put(data, status, grid)
+    if status == "TIMEOUT":
+        print(f"TIMEOUT after {budget}s: {len(partial['filled'])} cells filled, {len(partial['empty'])} empty, "
+              f"{len(partial['undecided'])} undecided.")
+        write_solution(partial_grid(n, partial), partial_txt)
+        print(f"Partial solution saved: {partial_txt}")
+        if grid is None:
+            return None
+        print("A solution was found, but its uniqueness was not proven.")
+    if status == "UNSATISFIABLE":
+        print("UNSATISFIABLE.")
+        return None
+    if status == "MULTIPLE":
+        print("MORE THAN ONE MODEL FOUND!")
+
+    # Write the solution to a text file
+    if "solution" not in fresh:
+        tracked = manifest if status != "TIMEOUT" else None  # solved again next time
+        with stage(timer, "solution_write"), produce(tracked, output_txt, keys.get("solution"), status=status) as path:
+            write_solution(grid, path)
+        print(f"Solution saved: {output_txt}")
+    if manifest is not None and "png" not in keys:
+        keys["png"] = incremental.stage_key(incremental.DRAW_SOURCES, instance=instance,
+                                            solution=incremental.file_hash(output_txt))
+
+    if draw and "png" not in fresh:
+        import drawthermo  # pygame is only needed when drawing
+        print("\nStep 4:\nDrawing final puzzle...")
+        with stage(timer, "draw"), produce(manifest, image_path, keys.get("png")) as path:
+            if isinstance(data, Puzzle):
+                drawthermo.render_puzzle(data, grid, path)
+            else:
+                drawthermo.render_to_file(data["grid"], grid, data["col_targets"], data["row_targets"], path)
+        print(f"Drawing completed! Saved to {image_path}")
+
+    print("\n-----------------------------------------")
+    print(f"Completed. Summary:")
+    if write_json:
+        print(f"JSON:       {json_path}")
+    if write_bin:
+        print(f"Binary:     {bin_path}")
+    if write_facts:
+        print(f"Facts:      {facts_path}")
+    print(f"Solution:   {output_txt}")
+    if draw:
+        print(f"Image:      {image_path}\n")
+    return grid
+
+
+def load_tuning(path=TUNING_FILE, threads=1):
+    # Settings written by tune.py, or None if there is no such file.
+    # tune.py measures one solver: with a portfolio (threads > 1) a tuned single-solver
+    # configuration (crafty, handy, ...) would give every thread the same settings, so it is
+    # left out and the portfolio keeps its per-thread strategies.
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        tuning = json.load(f)
+    if threads > 1 and tuning.get("configuration") not in (None, *portfolio.PORTFOLIO_CONFIGURATIONS):
+        print(f"Tuned configuration {tuning['configuration']} not used with --portfolio {threads} "
+              f"(it is a single-solver configuration)")
+        tuning = {**tuning, "configuration": None}
+    return tuning
+
+
+# --- MAIN ---
+def main():
+    parser = argparse.ArgumentParser(description="Solve a Thermometers instance with Clingo.")
+    parser.add_argument("input_txt", help="ASCII instance, e.g. examplesthermo/domXX.txt, or a .thb instance")
+    parser.add_argument("--json", action="store_true", help="also write the JSON instance to examplesthermo/")
+    parser.add_argument("--bin", action="store_true",
+                        help="also write the compact binary instance (.thb) to examplesthermo/")
+    parser.add_argument("--facts", action="store_true", help="also write the ASP facts to facts/")
+    parser.add_argument("--no-draw", action="store_true", help="skip drawing the solution")
+    parser.add_argument("--solver", choices=["clingo", "native"], default="clingo",
+                        help="clingo (default) or the native propagation solver")
+    parser.add_argument("--encoding", choices=sorted(ENCODINGS), default="cell",
+                        help="ASP encoding: cell (thermo.lp, default) or thermo (thermo_level.lp)")
+    parser.add_argument("--presolve", action="store_true",
+                        help="fix the cells decided by simple propagation before grounding")
+    parser.add_argument("--portfolio", type=int, default=1, metavar="THREADS",
+                        help="race THREADS differently configured clingo solvers (default 1)")
+    parser.add_argument("--configuration", default=None,
+                        choices=["auto", "frumpy", "jumpy", "tweety", "handy", "crafty", "trendy", "many"],
+                        help="clingo --configuration of the solvers (default: tuned, else auto)")
+    parser.add_argument("--tuning", default=TUNING_FILE, metavar="FILE",
+                        help="solver settings of tune.py (default: solver_config.json, used if it exists)")
+    parser.add_argument("--no-tuning", action="store_true", help="ignore the tuned solver settings")
+    parser.add_argument("--race", nargs="+", choices=portfolio.RACE_ENTRIES, default=None,
+                        help="race these encodings/solvers in separate processes, the first answer wins")
+    parser.add_argument("--inject", choices=["text", "backend"], default="text",
+                        help="give clingo the facts as text (default) or through its backend API")
+    parser.add_argument("--hint", nargs="?", const="auto", default=None, metavar="SOLUTION_TXT",
+                        help="warm-start clingo from a previous solution (default: solutions/solution_<name>.txt)")
+    parser.add_argument("--compare-hint", action="store_true",
+                        help="with --hint, also solve without it and print both search statistics")
+    parser.add_argument("--budget", default=None, metavar="SECONDS",
+                        help="time limit of the search in seconds, or 'auto' to pick it from the grid size")
+    parser.add_argument("--budgets", default=None, metavar="N:SECONDS,...",
+                        help="size-dependent budgets of --budget auto, e.g. '10:1,30:5,*:120' (the default)")
+    parser.add_argument("--cache", action="store_true",
+                        help="look up / store the solution in the on-disk solution cache")
+    parser.add_argument("--cache-dir", default=solution_cache.CACHE_DIR, help="cache folder (default: cache/)")
+    parser.add_argument("--cache-size", type=int, default=10000, help="maximum number of cached solutions")
+    parser.add_argument("--force", action="store_true",
+                        help="redo every stage, also those whose inputs did not change since the last run")
+    parser.add_argument("--manifest-dir", default=incremental.MANIFEST_DIR,
+                        help="where the artifacts of previous runs are tracked (default: manifest/)")
+    parser.add_argument("--report", metavar="FILE", default=None,
+                        help="save per-stage times, memory and clingo statistics as JSON")
+    parser.add_argument("--trace", metavar="FILE", default=None, help="save the stages as a Chrome trace (JSON)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also measure the peak Python memory of each stage (slower)")
+    args = parser.parse_args()
+    if args.presolve and (args.solver != "clingo" or args.encoding != "cell"):
+        parser.error("--presolve works with --solver clingo and --encoding cell")
+    if args.race and args.presolve:
+        parser.error("--race cannot be combined with --presolve")
+
+    budget = args.budget
+    if budget == "auto":
+        try:
+            budget = deadline.parse_budgets(args.budgets) if args.budgets else deadline.BUDGETS
+        except ValueError:
+            parser.error(f"--budgets: cannot read {args.budgets!r}")
+    elif budget is not None:
+        try:
+            budget = float(budget)
+        except ValueError:
+            parser.error("--budget needs a number of seconds or 'auto'")
+    if args.budgets and args.budget != "auto":
+        parser.error("--budgets is used with --budget auto")
 
-# Write the solution to a text file
-grid = [["."] * size for _ in range(size)]
-for (r, c) in fills:
-    grid[r][c] = "x"
+    hint = args.hint
+    if hint is not None and hint != "auto":
+        hint = warmstart.read_grid(hint)
+        if hint is None:
+            parser.error(f"--hint: {args.hint} not found")
 
-with open(output_txt, "w", encoding="utf-8") as f:
-    for row in grid:
-        f.write("".join(row) + "\n")
+    if not os.path.exists(args.input_txt):
+        print(f"Input file not found: {args.input_txt}")
+        sys.exit(1)
 
-print(f"Solution saved: {output_txt}")
+    tuning = None if args.no_tuning else load_tuning(args.tuning, args.portfolio if args.configuration is None else 1)
+    if tuning is not None:
+        if args.configuration is not None:  # an explicit --configuration wins
+            tuning = {**tuning, "configuration": args.configuration}
+        print(f"Tuned solver settings: {args.tuning}")
 
+    cache = solution_cache.SolutionCache(args.cache_dir, args.cache_size) if args.cache else None
+    # --compare-hint is about the search itself: it always solves
+    manifest = None if args.force or args.compare_hint else incremental.Manifest(args.manifest_dir)
+    timer = None
+    if args.report or args.trace or args.trace_memory:
+        timer = profiling.StageTimer(args.input_txt, trace_memory=args.trace_memory)
+    grid = run(args.input_txt, write_json=args.json, write_facts=args.facts, draw=not args.no_draw,
+               solver=args.solver, encoding=args.encoding,
+               use_presolve=args.presolve, cache=cache, timer=timer, write_bin=args.bin,
+               threads=args.portfolio, configuration=args.configuration or "auto", race=args.race,
+               budget=budget, inject=args.inject, tuning=tuning, hint=hint, compare_hint=args.compare_hint,
+               manifest=manifest)
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['entries']} entries ({stats['bytes']} bytes), {stats['evictions']} evicted")
+    if args.report:
+        profiling.write_report(timer.report(), args.report)
+        print(f"Report saved: {args.report}")
+    if args.trace:
+        profiling.write_chrome_trace(timer.chrome_trace_events(), args.trace)
+        print(f"Trace saved: {args.trace}")
+    if grid is None:
+        sys.exit(1)
 
-print("\nStep 4:\nDrawing final puzzle...")
-subprocess.run([sys.executable, DRAW, input_txt, output_txt], check=True)
-print(f"Drawing completed! Saved to solutions/solution_{base_name}.png")
 
-print("\n-----------------------------------------")
-print(f"Completed. Summary:")
-print(f"JSON:       {json_path}")
-print(f"Facts:      {facts_path}")
-print(f"Solution:   {output_txt}")
-print(f"Image:      solutions/solutions_{base_name}.png\n")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import sys
+import time
+import argparse
+import numpy as np
+
+# Native solver (no clingo): propagation + backtracking over the thermometers.
+#
+# Following thermo.lp, a thermometer can only be filled as a prefix starting from its bulb,
+# so the only variable of a thermometer is its fill length L (0..len(path)).
+# The domain of each thermometer is a bitset (Python int): bit L set <=> length L still possible.
+#
+# Lines are the rows (0..n-1) and the columns (n..2n-1). For a thermometer t and a line,
+# counts[L] = number of cells of path[:L] in that line. It never decreases with L, so the
+# smallest/largest contribution of t to the line comes from the lowest/highest bit of its domain.
+
+
+def low(d):   # smallest length in the domain
+    return (d & -d).bit_length() - 1
+
+def high(d):  # largest length in the domain
+    return d.bit_length() - 1
+
+
+class ThermoModel:
+    def __init__(self, n, thermo_paths, row_targets, col_targets):
+        self.n = n
+        self.paths = thermo_paths
+        self.puzzle = None
+        self.sizes = [len(path) for path in thermo_paths]
+        self.targets = list(row_targets) + list(col_targets)
+        self.line_thermos = [[] for _ in range(2 * n)]  # line -> [(t, counts, ge, le), ...]
+        self.thermo_lines = [[] for _ in thermo_paths]  # t -> lines it crosses
+
+        for t, path in enumerate(thermo_paths):
+            positions = {}  # line -> positions of the path in that line
+            for i, (r, c) in enumerate(path):
+                positions.setdefault(r, []).append(i)
+                positions.setdefault(n + c, []).append(i)
+            for line, pos in positions.items():
+                self.add_line(t, line, pos)
+
+    @classmethod
+    def from_puzzle(cls, puzzle):
+        # Same model, built from the per-row/per-column indexes of a puzzle.Puzzle
+        model = cls.__new__(cls)
+        n = puzzle.n
+        model.n = n
+        model.paths = None
+        model.puzzle = puzzle
+        model.sizes = np.diff(puzzle.offsets).tolist()
+        model.targets = puzzle.row_targets.tolist() + puzzle.col_targets.tolist()
+        model.line_thermos = [[] for _ in range(2 * n)]
+        model.thermo_lines = [[] for _ in model.sizes]
+
+        thermo_of = puzzle.thermo_of
+        pos_of = puzzle.pos_of
+        for base, offsets, entries in ((0, puzzle.row_offsets, puzzle.row_entries),
+                                       (n, puzzle.col_offsets, puzzle.col_entries)):
+            line_cells = puzzle.cells[entries]
+            thermos = thermo_of[line_cells].tolist()
+            positions = pos_of[line_cells].tolist()
+            bounds = offsets.tolist()
+            for line in range(n):
+                # entries of a line are sorted by thermometer, then by position
+                start = bounds[line]
+                end = bounds[line + 1]
+                while start < end:
+                    t = thermos[start]
+                    stop = start
+                    while stop < end and thermos[stop] == t:
+                        stop += 1
+                    model.add_line(t, base + line, positions[start:stop])
+                    start = stop
+        return model
+
+    def add_line(self, t, line, positions):
+        # Thermometer t has its cells at these positions (ascending) in the line
+        size = self.sizes[t]
+        arr = [0] * (size + 1)
+        inline = set(positions)
+        for i in range(size):
+            arr[i + 1] = arr[i] + (1 if i in inline else 0)
+
+        # ge[k]: lengths with count >= k, le[k]: lengths with count <= k
+        # counts grow by at most 1 per cell, so every value 0..top appears
+        full = (1 << (size + 1)) - 1
+        top = arr[-1]
+        first = [0] * (top + 1)
+        last = [0] * (top + 1)
+        for L in range(size, -1, -1):
+            first[arr[L]] = L
+        for L in range(size + 1):
+            last[arr[L]] = L
+        ge = [full ^ ((1 << first[k]) - 1) for k in range(top + 1)]
+        le = [(1 << (last[k] + 1)) - 1 for k in range(top + 1)]
+        self.line_thermos[line].append((t, arr, ge, le))
+        self.thermo_lines[t].append(line)
+
+    def initial_domains(self):
+        return [(1 << (size + 1)) - 1 for size in self.sizes]
+
+    def propagate(self, doms, lines):
+        # Bound propagation of the line sums until fixpoint. Returns False on a conflict.
+        queue = list(lines)
+        queued = set(queue)
+        while queue:
+            line = queue.pop()
+            queued.discard(line)
+            target = self.targets[line]
+            entries = self.line_thermos[line]
+
+            lo_sum = 0
+            hi_sum = 0
+            for (t, arr, ge, le) in entries:
+                d = doms[t]
+                lo_sum += arr[(d & -d).bit_length() - 1]  # low(d), inlined in this hot loop
+                hi_sum += arr[d.bit_length() - 1]         # high(d)
+            if lo_sum > target or hi_sum < target:
+                return False
+
+            for (t, arr, ge, le) in entries:
+                d = doms[t]
+                a_lo = arr[(d & -d).bit_length() - 1]
+                a_hi = arr[d.bit_length() - 1]
+                if a_lo == a_hi:
+                    continue
+                need = target - (hi_sum - a_hi)   # t must give at least this
+                room = target - (lo_sum - a_lo)   # and at most this
+                new = d
+                if need > a_lo:
+                    new &= ge[need]
+                if room < a_hi:
+                    new &= le[room]
+                if new != d:
+                    if new == 0:
+                        return False
+                    doms[t] = new
+                    lo_sum += arr[low(new)] - a_lo
+                    hi_sum += arr[high(new)] - a_hi
+                    for other in self.thermo_lines[t]:
+                        if other != line and other not in queued:
+                            queued.add(other)
+                            queue.append(other)
+        return True
+
+    def choose(self, doms):
+        # Most constrained first: fewest possible lengths, then the longest thermometer
+        best = None
+        best_key = None
+        for t, d in enumerate(doms):
+            if d & (d - 1):  # more than one length left
+                key = (d.bit_count(), -self.sizes[t])
+                if best_key is None or key < best_key:
+                    best = t
+                    best_key = key
+        return best
+
+    def search(self, models=2, budget=None):
+        # Returns up to `models` solutions, each one a list of fill lengths per thermometer.
+        # With a budget (seconds) the search stops when it runs out: self.timed_out is then True
+        # and the solutions found so far are returned. self.root keeps the domains after the
+        # root propagation (see root_cells).
+        stop = None if budget is None else time.monotonic() + budget
+        self.timed_out = False
+        doms = self.initial_domains()
+        self.root = doms
+        if not self.propagate(doms, range(2 * self.n)):
+            return []
+
+        solutions = []
+        stack = [doms]
+        while stack and len(solutions) < models:
+            if stop is not None and time.monotonic() > stop:
+                self.timed_out = True
+                break
+            doms = stack.pop()
+            t = self.choose(doms)
+            if t is None:
+                solutions.append([low(d) for d in doms])
+                continue
+            d = doms[t]
+            lengths = [L for L in range(high(d) + 1) if d >> L & 1]
+            for L in reversed(lengths):  # shortest length is explored first
+                child = doms.copy()
+                child[t] = 1 << L
+                if self.propagate(child, self.thermo_lines[t]):
+                    stack.append(child)
+        return solutions
+
+    def fills(self, lengths):
+        if self.puzzle is not None:
+            return self.puzzle.fill_cells(lengths)
+        cells = []
+        for path, L in zip(self.paths, lengths):
+            cells.extend(path[:L])
+        return cells
+
+    def root_cells(self):
+        # (filled, empty, undecided) cells after the root propagation of the last search
+        filled = self.fills([low(d) for d in self.root])
+        possible = set(self.fills([high(d) for d in self.root]))
+        undecided = possible - set(filled)
+        empty = [cell for cell in self.fills(self.sizes) if cell not in possible]
+        return filled, empty, undecided
+
+
+def solve_paths(n, thermo_paths, row_targets, col_targets, models=2):
+    # thermo_paths as returned by step_1.thermos / step_1_optional.build_thermos
+    model = ThermoModel(n, thermo_paths, row_targets, col_targets)
+    return [model.fills(lengths) for lengths in model.search(models)]
+
+
+def solve(data, budget=None, partial=None):
+    # Same result as main.solve, but from the JSON data: (size, fills, nummodels)
+    # budget/partial as in main.solve (the partial result has no clingo statistics; without
+    # partial, a timeout raises TimeoutError)
+    paths = [[(node["r"], node["c"]) for node in path] for path in data["thermometers"]]
+    model = ThermoModel(data["n"], paths, data["row_targets"], data["col_targets"])
+    return data["n"], *solve_model(model, budget, partial)
+
+
+def solve_puzzle(puzzle, budget=None, partial=None):
+    # Same as solve(), from a puzzle.Puzzle
+    model = ThermoModel.from_puzzle(puzzle)
+    return puzzle.n, *solve_model(model, budget, partial)
+
+
+def solve_model(model, budget=None, partial=None):
+    # (fills, nummodels) of a ThermoModel
+    solutions = [model.fills(lengths) for lengths in model.search(models=2, budget=budget)]
+    if model.timed_out and partial is None:
+        raise TimeoutError(f"no answer within {budget}s")
+    if model.timed_out:
+        filled, empty, undecided = model.root_cells()
+        partial["timed_out"] = True
+        partial.update({"filled": sorted(filled), "empty": sorted(empty), "undecided": sorted(undecided),
+                        "stats": {}})
+    fills = solutions[0] if solutions else []
+    return fills, len(solutions)
+
+
+def check_agreement(instances):
+    # Solve each instance with clingo and with the native solver and compare the results
+    import main
+    import encode
+
+    ok = True
+    for input_txt in instances:
+        data = main.parse_instance(input_txt)
+        if data is None:
+            print(f"{input_txt}: could not be parsed")
+            ok = False
+            continue
+        size, fills, nummodels = main.solve(encode.encode(data))
+        n_size, n_fills, n_nummodels = solve(data)
+        same = nummodels == n_nummodels and (nummodels != 1 or sorted(fills) == sorted(n_fills))
+        print(f"{input_txt}: clingo={nummodels} native={n_nummodels} models -> {'OK' if same else 'MISMATCH'}")
+        ok = ok and same
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the native solver against clingo.")
+    parser.add_argument("instances", nargs="+", help="ASCII instances, e.g. examplesthermo/*.txt")
+    args = parser.parse_args()
+    sys.exit(0 if check_agreement(args.instances) else 1)
@@ -0,0 +1,119 @@
+import io
+import time
+import queue
+import contextlib
+import multiprocessing
+
+# Portfolio solving: several strategies race on one instance and the first answer wins.
+#
+# Threads (inside one clingo Control): parallel_mode "<threads>,compete" runs one clasp solver
+# per thread on the same ground program. On top of the per-thread defaults of --configuration,
+# configure() gives every thread its own heuristic, default sign, restart policy and seed
+# (THREAD_STRATEGIES, in order). When one thread ends the search, clasp stops the others.
+#
+# Processes (race()): alternative encodings or solvers ("cell" = thermo.lp, "thermo" =
+# thermo_level.lp, "native" = native_solver.py) run in separate processes. The first one that
+# answers wins and the others are terminated.
+
+THREAD_STRATEGIES = [
+    {},                                                    # the --configuration defaults
+    {"heuristic": "Berkmin", "sign_def": "neg"},
+    {"heuristic": "Vsids,92", "sign_def": "pos", "restarts": "L,100"},
+    {"heuristic": "Vmtf", "restarts": "x,128,1.5"},
+    {"heuristic": "Vsids,95", "sign_def": "rnd", "rand_freq": "0.02"},
+    {"heuristic": "Berkmin", "restarts": "D,100,0.7"},
+    {"heuristic": "Vsids,92", "sign_def": "neg", "restarts": "no"},
+    {"heuristic": "Vmtf", "sign_def": "pos", "rand_freq": "0.05"},
+]
+
+# Configurations with a solver entry per thread (see configure())
+PORTFOLIO_CONFIGURATIONS = ("auto", "many")
+
+RACE_ENTRIES = ["cell", "thermo", "native"]
+POLL = 0.1  # seconds between two checks that the race processes are still alive
+
+
+def control_args(threads, configuration="auto", heuristic=None):
+    # Command line arguments of clingo.Control for a portfolio of `threads` threads
+    args = [f"--configuration={configuration}"]
+    if heuristic is not None:
+        args.append(f"--heuristic={heuristic}")
+    if threads > 1:
+        args.append(f"--parallel-mode={threads},compete")
+    return args
+
+
+def configure(ctl, threads):
+    # Different strategy (and seed) per thread, cycling through THREAD_STRATEGIES.
+    # Only PORTFOLIO_CONFIGURATIONS have a solver entry per thread; with a
+    # single-solver one (crafty, handy, ...) every thread runs the settings of entry 0.
+    if threads <= 1:
+        return
+    for i in range(min(threads, len(ctl.configuration.solver))):
+        solver = ctl.configuration.solver[i]
+        strategy = THREAD_STRATEGIES[i % len(THREAD_STRATEGIES)]
+        if "heuristic" in strategy:
+            solver.dom_mod = "no"  # the default portfolio may have set domain modifiers for this thread
+        for key, value in strategy.items():
+            setattr(solver, key, value)
+        solver.seed = str(i + 1)
+
+
+def run_entry(entry, data, threads, results):
+    # Runs in a race process: solve data with one entry and put (entry, result, error) in results
+    import main
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):  # the steps printed by solve_step
+            if entry == "native":
+                result = main.solve_step(data, solver="native")
+            else:
+                result = main.solve_step(data, encoding=entry, threads=threads)
+        results.put((entry, result, None))
+    except Exception as e:
+        results.put((entry, None, str(e)))
+
+
+def race(data, entries=RACE_ENTRIES, threads=1, timeout=None):
+    # Solve data (JSON data or puzzle.Puzzle) with every entry in its own process.
+    # Returns (winner, (size, fills, nummodels)), or (None, None) if no entry answered in time.
+    entries = list(dict.fromkeys(entries))  # each entry races once
+    ctx = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=run_entry, args=(entry, data, threads, results), daemon=True) for entry in entries]
+    for p in procs:
+        p.start()
+
+    winner = None
+    result = None
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = dict(zip(entries, procs))  # entries that have neither answered nor died
+    try:
+        while pending and winner is None:
+            wait = POLL if deadline is None else min(POLL, max(0.0, deadline - time.monotonic()))
+            try:
+                entry, res, error = results.get(timeout=wait)
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                # a process killed (OOM, signal) before it answered never will; one that ended
+                # normally has put its answer, which may still be on its way
+                for entry, p in list(pending.items()):
+                    if p.exitcode not in (None, 0):
+                        del pending[entry]
+                        print(f"Portfolio: {entry} failed (exit code {p.exitcode})")
+                continue
+            if pending.pop(entry, None) is None:  # already counted as failed
+                continue
+            if error is None:
+                winner, result = entry, res
+            else:
+                print(f"Portfolio: {entry} failed ({error})")
+    finally:
+        # cancel the losers
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join()
+        results.close()
+    return winner, result
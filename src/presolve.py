@@ -0,0 +1,81 @@
+import sys
+import json
+
+import native_solver
+
+# Pre-solve deductions, between the parse step (step_1.py) and encode.py.
+#
+# The fill length of every thermometer is bounded with the row/column sums until fixpoint
+# (the root propagation of native_solver.py). This covers:
+#   - rows/columns with target 0 (nothing can be filled there),
+#   - rows/columns whose target equals the number of thermometer cells (everything is filled),
+#   - thermometers longer than what is left of the row/column budget,
+#   - bulbs (and prefixes) that must be filled for the sums to be reached.
+# With bounds lo..hi for a thermometer, path[:lo] is surely filled, path[hi:] surely empty
+# and only path[lo:hi] is left for clingo.
+
+
+def deduce(data):
+    # Returns the (lo, hi) fill-length bounds of every thermometer, or None if there is no solution
+    paths = [[(node["r"], node["c"]) for node in path] for path in data["thermometers"]]
+    model = native_solver.ThermoModel(data["n"], paths, data["row_targets"], data["col_targets"])
+    doms = model.initial_domains()
+    if not model.propagate(doms, range(2 * data["n"])):
+        return None
+    return [(native_solver.low(d), native_solver.high(d)) for d in doms]
+
+
+def reduce(data):
+    # Residual JSON data: "thermometers" only keeps the free part of each thermometer, and
+    # "fixed_fill" / "fixed_empty" list the decided cells. Targets are not changed.
+    # Returns None if the deductions already show that there is no solution.
+    bounds = deduce(data)
+    if bounds is None:
+        return None
+
+    free = []
+    fixed_fill = []
+    fixed_empty = []
+    for path, (lo, hi) in zip(data["thermometers"], bounds):
+        fixed_fill.extend(path[:lo])
+        fixed_empty.extend(path[hi:])
+        if hi > lo:
+            free.append(path[lo:hi])
+
+    reduced = dict(data)
+    reduced["thermometers"] = free
+    reduced["fixed_fill"] = fixed_fill
+    reduced["fixed_empty"] = fixed_empty
+    return reduced
+
+
+def report(data, reduced):
+    total = sum(len(path) for path in data["thermometers"])
+    if reduced is None:
+        return f"Presolve: no solution ({total} cells)."
+    decided = len(reduced["fixed_fill"]) + len(reduced["fixed_empty"])
+    return (f"Presolve: {decided} of {total} cells decided "
+            f"({len(reduced['fixed_fill'])} filled, {len(reduced['fixed_empty'])} empty), "
+            f"{total - decided} left for the solver.")
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python src/presolve.py examplesthermo/dom__.json examplesthermo/dom__.presolved.json")
+        sys.exit(1)
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    reduced = reduce(data)
+    print(report(data, reduced))
+    if reduced is None:
+        sys.exit(1)
+
+    with open(sys.argv[2], "w", encoding="utf-8") as f:
+        json.dump(reduced, f, indent=2, ensure_ascii=False)
+    print(f"Residual instance saved to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import resource
+import tracemalloc
+import threading
+import contextlib
+
+# Per-stage measurements of the pipeline (parse, json, encode, ground, solve, decode, draw, ...):
+# wall time, CPU time and memory, plus the clingo statistics of the solve.
+#
+#   timer = StageTimer()
+#   with timer.stage("parse"):
+#       ...
+#   timer.report()              -> dict, saved as JSON with --report
+#   timer.chrome_trace_events() -> events for chrome://tracing / Perfetto, saved with --trace
+#
+# Memory: peak_rss_kb is the peak resident size of the process at the end of the stage
+# (includes clingo). With trace_memory=True, peak_py_bytes is the peak of the Python
+# allocations during the stage (tracemalloc, slower).
+
+
+def stage(timer, name):
+    # timer.stage(name), or nothing if there is no timer
+    return timer.stage(name) if timer is not None else contextlib.nullcontext()
+
+
+def clingo_stats(ctl):
+    # The interesting part of ctl.statistics, as plain numbers
+    s = ctl.statistics
+    lp = s["problem"]["lp"]
+    gen = s["problem"]["generator"]
+    solvers = s["solving"]["solvers"]
+    return {
+        "atoms": int(lp["atoms"]),
+        "rules": int(lp["rules"]),
+        "bodies": int(lp["bodies"]),
+        "vars": int(gen["vars"]),
+        "constraints": int(gen["constraints"]),
+        "choices": int(solvers["choices"]),
+        "conflicts": int(solvers["conflicts"]),
+        "restarts": int(solvers["restarts"]),
+        "models": int(s["summary"]["models"]["enumerated"]),
+        "time_total": s["summary"]["times"]["total"],
+        "time_solve": s["summary"]["times"]["solve"],
+    }
+
+
+class StageTimer:
+    def __init__(self, name="", trace_memory=False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.stages = []   # [{"name", "start", "wall", "cpu", "peak_rss_kb", ...}, ...]
+        self.clingo = None
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.time()
+        wall0 = time.perf_counter()
+        cpu0 = time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                "name": name,
+                "start": start,
+                "wall": time.perf_counter() - wall0,
+                "cpu": time.process_time() - cpu0,
+                "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            }
+            if self.trace_memory:
+                record["peak_py_bytes"] = tracemalloc.get_traced_memory()[1]
+            self.stages.append(record)
+
+    def record_clingo(self, ctl):
+        self.clingo = clingo_stats(ctl)
+
+    def times(self):
+        # {stage: wall seconds}, stages that run more than once are added up
+        out = {}
+        for record in self.stages:
+            out[record["name"]] = out.get(record["name"], 0.0) + record["wall"]
+        return out
+
+    def report(self):
+        return {
+            "instance": self.name,
+            "stages": [{k: v for k, v in record.items() if k != "start"} for record in self.stages],
+            "total": {
+                "wall": sum(record["wall"] for record in self.stages),
+                "cpu": sum(record["cpu"] for record in self.stages),
+                "peak_rss_kb": max((record["peak_rss_kb"] for record in self.stages), default=0),
+            },
+            "clingo": self.clingo,
+        }
+
+    def chrome_trace_events(self):
+        # Complete events ("ph": "X") in microseconds, one row per process/thread
+        pid = os.getpid()
+        tid = threading.get_ident() % 100000
+        events = []
+        for record in self.stages:
+            args = {k: v for k, v in record.items() if k not in ("name", "start", "wall")}
+            if record["name"] == "solve" and self.clingo is not None:
+                args.update(self.clingo)
+            events.append({"name": record["name"], "cat": self.name, "ph": "X", "pid": pid, "tid": tid,
+                           "ts": record["start"] * 1e6, "dur": record["wall"] * 1e6, "args": args})
+        return events
+
+
+def write_report(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+def write_chrome_trace(events, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,134 @@
+import numpy as np
+
+import fast_parse
+import step_1
+
+# In-memory puzzle model shared by encode.py, native_solver.py and drawthermo.py.
+#
+# Everything is stored in flat NumPy buffers (no Python object per cell):
+#   grid          n x n uint8, the ASCII symbols (may be a memory map, see instance_bin.py)
+#   col_targets   n int32
+#   row_targets   n int32
+#   offsets       T+1 int64, thermometer t is cells[offsets[t]:offsets[t+1]] (from the bulb)
+#   cells         M int32, flat cell indices r*n + c
+# and lookup tables computed once:
+#   thermo_of     n*n int32, thermometer of each cell (-1 if none)
+#   pos_of        n*n int32, position of each cell in its thermometer (0 = bulb)
+#   row_offsets / row_entries   entries (indices into cells) of every row, in CSR form:
+#                 row r has cells[row_entries[row_offsets[r]:row_offsets[r+1]]]
+#   col_offsets / col_entries   the same for the columns
+# The entries of a line are sorted by thermometer and then by position.
+
+
+def line_index(lines, count):
+    # CSR index of the entries grouped by line: (offsets, entries)
+    entries = np.argsort(lines, kind="stable").astype(np.int32)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(lines, minlength=count), out=offsets[1:])
+    return offsets, entries
+
+
+class Puzzle:
+    __slots__ = ("n", "grid", "col_targets", "row_targets", "offsets", "cells",
+                 "thermo_of", "pos_of", "row_offsets", "row_entries", "col_offsets", "col_entries")
+
+    def __init__(self, grid, col_targets, row_targets, offsets, cells):
+        self.n = n = grid.shape[0]
+        self.grid = grid
+        self.col_targets = np.asarray(col_targets, dtype=np.int32)
+        self.row_targets = np.asarray(row_targets, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.cells = np.asarray(cells, dtype=np.int32)
+
+        lengths = np.diff(self.offsets)
+        entry_thermo = np.repeat(np.arange(len(lengths), dtype=np.int32), lengths)
+        self.thermo_of = np.full(n * n, -1, dtype=np.int32)
+        self.thermo_of[self.cells] = entry_thermo
+        self.pos_of = np.full(n * n, -1, dtype=np.int32)
+        self.pos_of[self.cells] = np.arange(len(self.cells), dtype=np.int64) - self.offsets[entry_thermo]
+
+        rows, cols = np.divmod(self.cells, n)
+        self.row_offsets, self.row_entries = line_index(rows, n)
+        self.col_offsets, self.col_entries = line_index(cols, n)
+
+    @classmethod
+    def from_parsed(cls, parsed):
+        # From the result of fast_parse.parse_arrays
+        grid_lines, arr, col_sums, row_sums, bulbs, offsets, cells = parsed
+        return cls(arr, col_sums, row_sums, offsets, cells)
+
+    @classmethod
+    def from_json_data(cls, data):
+        # From the JSON data of step_1.py
+        n = data["n"]
+        grid = np.frombuffer("".join("".join(row) for row in data["grid"]).encode("ascii", "replace"),
+                             dtype=np.uint8).reshape(n, n)
+        paths = data["thermometers"]
+        offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+        np.cumsum([len(path) for path in paths], out=offsets[1:])
+        cells = [node["r"] * n + node["c"] for path in paths for node in path]
+        return cls(grid, data["col_targets"], data["row_targets"], offsets, cells)
+
+    @property
+    def num_thermos(self):
+        return len(self.offsets) - 1
+
+    def length(self, t):
+        return int(self.offsets[t + 1] - self.offsets[t])
+
+    def path(self, t):
+        # Flat cell indices of thermometer t, from the bulb
+        return self.cells[self.offsets[t]:self.offsets[t + 1]]
+
+    def bulbs(self):
+        # Flat cell index of the bulb of every thermometer
+        return self.cells[self.offsets[:-1]]
+
+    def lookup(self, r, c):
+        # (thermometer, position) of cell (r, c), or None if it is not in a thermometer
+        k = r * self.n + c
+        t = int(self.thermo_of[k])
+        return (t, int(self.pos_of[k])) if t >= 0 else None
+
+    def row(self, r):
+        # Flat cell indices of the thermometer cells in row r
+        return self.cells[self.row_entries[self.row_offsets[r]:self.row_offsets[r + 1]]]
+
+    def col(self, c):
+        return self.cells[self.col_entries[self.col_offsets[c]:self.col_offsets[c + 1]]]
+
+    def grid_lines(self):
+        n = self.n
+        text = np.ascontiguousarray(self.grid).tobytes().decode("ascii")
+        return [text[r * n:(r + 1) * n] for r in range(n)]
+
+    def paths(self):
+        # [[(r, c), ...], ...] of every thermometer (Python objects: for small grids and JSON)
+        rs, cs = np.divmod(self.cells, self.n)
+        coords = list(zip(rs.tolist(), cs.tolist()))
+        bounds = self.offsets.tolist()
+        return [coords[bounds[t]:bounds[t + 1]] for t in range(self.num_thermos)]
+
+    def fill_cells(self, lengths):
+        # [(r, c), ...] filled when thermometer t is filled up to lengths[t]
+        starts = self.offsets[:-1]
+        lengths = np.asarray(lengths, dtype=np.int64)
+        idx = np.repeat(starts, lengths) + (np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+        rs, cs = np.divmod(self.cells[idx], self.n)
+        return list(zip(rs.tolist(), cs.tolist()))
+
+    def nbytes(self):
+        # Memory of the buffers (a memory-mapped grid is counted as well)
+        return sum(getattr(self, name).nbytes for name in self.__slots__ if name != "n")
+
+    def to_json_data(self):
+        # The JSON data of step_1.py (debug export, and for presolve.py / thermo_level.lp)
+        paths = self.paths()
+        lines = self.grid_lines()
+        found_bulbs = []
+        for path in paths:
+            r, c = path[0]
+            dr, dc = fast_parse.DIRS[fast_parse.BULB_DIR[ord(lines[r][c])]]
+            found_bulbs.append((r, c, dr, dc))
+        return step_1.to_json_data([list(row) for row in lines], self.col_targets.tolist(),
+                                   self.row_targets.tolist(), found_bulbs, paths)
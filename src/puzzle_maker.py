@@ -0,0 +1,181 @@
+import os
+import sys
+import time
+import random
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import clingo
+
+import main
+import generate
+
+# Unique puzzle generator.
+#
+# A puzzle starts as random thermometers (generate.py) with a hidden fill, and the targets are
+# derived from that fill. While clingo finds a solution different from the hidden fill, the
+# puzzle is modified and checked again:
+#   - each thermometer where both solutions differ gets (with probability 1/2) an empty or a
+#     full hidden fill, which usually removes the ambiguity;
+#   - every `relayout_every` rounds, the thermometers around one ambiguous cell are drawn again.
+# The targets are recomputed after every change. It stops when the hidden fill is the only solution.
+#
+# The uniqueness check (thermo.lp + unique.lp) is ground ONCE per grid size and per worker:
+# thermometers, targets and hidden fill are externals, so a new candidate only switches the
+# externals that changed and solves again, without regrounding.
+
+UNIQUE = os.path.join(main.BASE_DIR, "unique.lp")
+
+
+def fn(name, *args):
+    return clingo.Function(name, [clingo.Number(a) for a in args])
+
+
+class UniquenessChecker:
+    def __init__(self, n):
+        self.n = n
+        self.ctl = clingo.Control()
+        self.ctl.load(main.THERMO)
+        self.ctl.load(UNIQUE)
+        facts = [f"dim({n})."] + [f"cell({r},{c})." for r in range(n) for c in range(n)]
+        self.ctl.add("base", [], "\n".join(facts))
+        self.ctl.ground([("base", [])])
+        self.on = set()   # externals that are currently true
+
+    def set_puzzle(self, paths, lengths, row_targets, col_targets):
+        atoms = set()
+        for path, L in zip(paths, lengths):
+            for i in range(1, len(path)):
+                (r, c), (pr, pc) = path[i], path[i - 1]
+                atoms.add(fn("prev", r, c, pr, pc))
+            for (r, c) in path[:L]:
+                atoms.add(fn("hidden", r, c))
+        for r, k in enumerate(row_targets):
+            atoms.add(fn("row_target", r, k))
+        for c, k in enumerate(col_targets):
+            atoms.add(fn("col_target", c, k))
+
+        for atom in self.on - atoms:
+            self.ctl.assign_external(atom, False)
+        for atom in atoms - self.on:
+            self.ctl.assign_external(atom, True)
+        self.on = atoms
+
+    def alternative(self):
+        # A solution (set of filled cells) different from the hidden fill, or None if it is unique
+        with self.ctl.solve(yield_=True) as handle:
+            for model in handle:
+                return {(a.arguments[0].number, a.arguments[1].number)
+                        for a in model.symbols(shown=True) if a.name == "fill"}
+        return None
+
+
+def targets(n, paths, lengths):
+    row_targets = [0] * n
+    col_targets = [0] * n
+    for path, L in zip(paths, lengths):
+        for (r, c) in path[:L]:
+            row_targets[r] += 1
+            col_targets[c] += 1
+    return row_targets, col_targets
+
+
+def make_puzzle(checker, rnd, density=0.5, max_len=None, turn_prob=0.0, max_rounds=500, relayout_every=25,
+                radius=1):
+    # Returns (paths, lengths, rounds) of a unique puzzle, or None after max_rounds changes
+    n = checker.n
+    paths = generate.random_thermos(n, rnd, max_len, turn_prob)
+    lengths = generate.hidden_fill(paths, density, rnd)
+
+    for rounds in range(1, max_rounds + 1):
+        row_targets, col_targets = targets(n, paths, lengths)
+        checker.set_puzzle(paths, lengths, row_targets, col_targets)
+        alt = checker.alternative()
+        if alt is None:
+            return paths, lengths, rounds
+
+        hidden = {cell for path, L in zip(paths, lengths) for cell in path[:L]}
+        diff = sorted(alt ^ hidden)
+        owner = {cell: t for t, path in enumerate(paths) for cell in path}
+
+        if rounds % relayout_every != 0:
+            # Empty or full hidden fill for the ambiguous thermometers
+            for t in sorted({owner[cell] for cell in diff}):
+                if rnd.random() < 0.5:
+                    lengths[t] = rnd.choice([0, len(paths[t])])
+            continue
+
+        # Draw again the thermometers around one ambiguous cell
+        r, c = rnd.choice(diff)
+        dropped = {owner[(rr, cc)]
+                   for rr in range(max(0, r - radius), min(n, r + radius + 1))
+                   for cc in range(max(0, c - radius), min(n, c + radius + 1))}
+        free = [cell for t in dropped for cell in paths[t]]
+        kept = [t for t in range(len(paths)) if t not in dropped]
+        new_paths = generate.random_thermos(n, rnd, max_len, turn_prob, free_cells=free)
+        paths = [paths[t] for t in kept] + new_paths
+        lengths = [lengths[t] for t in kept] + generate.hidden_fill(new_paths, density, rnd)
+    return None
+
+
+_checkers = {}  # grid size -> UniquenessChecker of this worker process
+
+def make_one(seed, n, density=0.5, max_len=None, turn_prob=0.0, max_rounds=500):
+    # Runs in the worker. Returns {"text", "rounds", "time"} or None if no unique puzzle was found
+    if n not in _checkers:
+        _checkers[n] = UniquenessChecker(n)
+    t0 = time.perf_counter()
+    rnd = random.Random(seed)
+    puzzle = make_puzzle(_checkers[n], rnd, density, max_len, turn_prob, max_rounds)
+    if puzzle is None:
+        return None
+    paths, lengths, rounds = puzzle
+    return {"text": generate.to_ascii(n, paths, lengths, rnd), "rounds": rounds,
+            "time": time.perf_counter() - t0}
+
+
+def main_maker():
+    parser = argparse.ArgumentParser(description="Generate Thermometers puzzles with a unique solution.")
+    parser.add_argument("n", type=int, help="grid size (n x n)")
+    parser.add_argument("--count", type=int, default=10, help="number of puzzles")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--density", type=float, default=0.5, help="fraction of filled cells")
+    parser.add_argument("--max-len", type=int, default=None, help="maximum thermometer length (default n)")
+    parser.add_argument("--curved", action="store_true", help="thermometers with turns (0-3)")
+    parser.add_argument("--turn-prob", type=float, default=0.3, help="probability of a turn per step with --curved")
+    parser.add_argument("--max-rounds", type=int, default=500, help="changes tried per puzzle before giving up")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first puzzle (the next ones use seed+1, ...)")
+    parser.add_argument("-o", "--output", default=os.path.join(main.BASE_DIR, "..", "puzzles"),
+                        help="output folder (default: puzzles/)")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    worker = partial(make_one, n=args.n, density=args.density, max_len=args.max_len,
+                     turn_prob=args.turn_prob if args.curved else 0.0, max_rounds=args.max_rounds)
+    seeds = range(args.seed, args.seed + args.count)
+
+    start = time.perf_counter()
+    made = 0
+    rounds = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for seed, puzzle in zip(seeds, pool.map(worker, seeds)):
+            if puzzle is None:
+                print(f"seed {seed}: no unique puzzle after {args.max_rounds} rounds")
+                continue
+            out_path = os.path.join(args.output, f"puzzle_{args.n}_{seed:05d}.txt")
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(puzzle["text"])
+            made += 1
+            rounds += puzzle["rounds"]
+    elapsed = time.perf_counter() - start
+
+    print(f"{made} unique {args.n}x{args.n} puzzles in {elapsed:.2f}s ({made / elapsed:.1f} puzzles/s)")
+    if made:
+        print(f"{rounds / made:.1f} uniqueness checks per puzzle on average")
+    print(f"Puzzles saved in {args.output}")
+    if made < args.count:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_maker()
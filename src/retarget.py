@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import argparse
+import clingo
+
+import main
+import encode
+
+# Multi-shot re-solving after target changes (editor, hints).
+#
+# TargetSolver grounds thermo.lp + targets.lp once for a grid: the thermometers are facts and
+# the row/column targets are externals. set_targets() only switches the externals of the
+# targets that changed (assign_external), and solve() runs a new search on the same ground
+# program, so an edit costs a solve, not an encode + reground.
+#
+#   python src/retarget.py examplesthermo/dom06.txt
+#   > row 3 4         (set the target of row 3 to 4)
+#   > col 0 2
+#   > solve           (an empty line also solves)
+
+TARGETS = os.path.join(main.BASE_DIR, "targets.lp")
+
+
+class TargetSolver:
+    def __init__(self, puzzle):
+        self.n = puzzle.n
+        self.ctl = clingo.Control()
+        self.ctl.configuration.solve.models = "2"  # 2 models at most, as main.solve
+        self.ctl.load(main.THERMO)
+        self.ctl.load(TARGETS)
+        arrays = [(name, rows) for name, rows in encode.puzzle_fact_arrays(puzzle)
+                  if name not in ("row_target", "col_target")]
+        self.ctl.add("base", [], "".join(encode.iter_fact_text(arrays)))
+        self.ctl.ground([("base", [])])
+
+        # largest target with an external in each row / column (its number of thermometer cells)
+        self.row_max = [0] * self.n
+        self.col_max = [0] * self.n
+        for atom in self.ctl.symbolic_atoms.by_signature("target_row_cells", 2):
+            r, m = (arg.number for arg in atom.symbol.arguments)
+            self.row_max[r] = m
+        for atom in self.ctl.symbolic_atoms.by_signature("target_col_cells", 2):
+            c, m = (arg.number for arg in atom.symbol.arguments)
+            self.col_max[c] = m
+        self.row_targets = [None] * self.n  # targets currently switched on
+        self.col_targets = [None] * self.n
+        self.set_targets(puzzle.row_targets.tolist(), puzzle.col_targets.tolist())
+
+    def set_target(self, name, line, k):
+        # name is "row_target" or "col_target"
+        current = self.row_targets if name == "row_target" else self.col_targets
+        if current[line] == k:
+            return
+        if current[line] is not None:
+            self.ctl.assign_external(clingo.Function(name, [clingo.Number(line), clingo.Number(current[line])]), False)
+        current[line] = k
+        limit = self.row_max if name == "row_target" else self.col_max
+        if 0 <= k <= limit[line]:
+            self.ctl.assign_external(clingo.Function(name, [clingo.Number(line), clingo.Number(k)]), True)
+
+    def set_targets(self, row_targets=None, col_targets=None):
+        # New targets (whole lists, None = unchanged); only the changed lines are touched
+        for r, k in enumerate(row_targets or []):
+            self.set_target("row_target", r, k)
+        for c, k in enumerate(col_targets or []):
+            self.set_target("col_target", c, k)
+
+    def feasible(self):
+        # False if a target cannot be reached by any fill (it has no external), or if the row
+        # and column targets do not add up to the same number of filled cells: one edited
+        # target always breaks that, and clasp can need minutes to prove it (a counting argument)
+        return (sum(self.row_targets) == sum(self.col_targets) and
+                all(0 <= k <= m for k, m in zip(self.row_targets, self.row_max)) and
+                all(0 <= k <= m for k, m in zip(self.col_targets, self.col_max)))
+
+    def solve(self):
+        # (size, fills, nummodels) for the current targets, as main.solve
+        if not self.feasible():
+            return self.n, [], 0
+        symbols = []
+        nummodels = 0
+        with self.ctl.solve(yield_=True) as handle:
+            for model in handle:
+                if nummodels > 0:
+                    nummodels += 1
+                    break
+                symbols = model.symbols(shown=True)
+                nummodels += 1
+        fills = [(atom.arguments[0].number, atom.arguments[1].number) for atom in symbols if atom.name == "fill"]
+        return self.n, fills, nummodels
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-solve a Thermometers grid after changing its targets.")
+    parser.add_argument("input_txt", help="ASCII or .thb instance")
+    args = parser.parse_args()
+
+    data = main.parse_instance(args.input_txt, as_puzzle=True)
+    if data is None:
+        sys.exit(1)
+    start = time.perf_counter()
+    solver = TargetSolver(data)
+    print(f"Ground in {time.perf_counter() - start:.3f}s. Commands: row R K, col C K, solve (or empty line), quit")
+
+    for line in sys.stdin:
+        words = line.split()
+        if words and words[0] == "quit":
+            break
+        if words and words[0] in ("row", "col"):
+            try:
+                index, k = int(words[1]), int(words[2])
+                if len(words) != 3:
+                    raise ValueError
+            except (ValueError, IndexError):
+                print(f"Usage: {words[0]} {words[0][0].upper()} K (two whole numbers)")
+                continue
+            if not 0 <= index < solver.n:
+                print(f"There is no {words[0]} {index}.")
+            else:
+                solver.set_target(f"{words[0]}_target", index, k)
+            continue
+        if words and words[0] != "solve":
+            print("Commands: row R K, col C K, solve (or empty line), quit")
+            continue
+        start = time.perf_counter()
+        size, fills, nummodels = solver.solve()
+        elapsed = time.perf_counter() - start
+        print(f"{main.status_of(nummodels)} in {elapsed * 1000:.1f} ms")
+        if nummodels > 0:
+            print("\n".join(main.solution_grid(size, fills)))
+        sys.stdout.flush()
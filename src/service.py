@@ -0,0 +1,328 @@
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import main
+import fast_parse
+import native_solver
+from puzzle import Puzzle
+
+# Long-running solve service: JSON lines over TCP, a Unix socket or stdin/stdout.
+#
+# Request (one line):   {"id": 1, "ascii": "<contents of a .txt instance>"}
+#                       {"id": 2, "json": {<JSON data of step_1.py>}, "solver": "native", "timeout": 5}
+#                       {"id": 3, "op": "stats"}
+# Response (one line):  {"id": 1, "status": "UNIQUE", "n": 6, "grid": [...], "time": 0.01}
+# status is UNIQUE, MULTIPLE, UNSATISFIABLE, ERROR (with "error") or TIMEOUT.
+#
+# The puzzles are solved by a pool of worker processes started (and warmed up: clingo imported,
+# the encodings read, one small instance solved) when the service starts. Responses are sent as
+# soon as they are ready, so they may come back in another order than the requests.
+#
+# Limits:
+#   --max-concurrent  requests being solved at once (over all connections); a request the service
+#                     gave up on keeps its slot until its worker has really finished
+#   --max-pending     requests read from one connection and not answered yet; when it is reached
+#                     the service stops reading that connection, so a fast client is slowed
+#                     down by TCP (back-pressure)
+#   --timeout         default time limit per request (a request can give its own "timeout", a
+#                     positive number of seconds)
+#
+# The time limit is the budget of the search in the worker (deadline.py): when it runs out the
+# search is interrupted and the response is a TIMEOUT with "partial" (number of filled, empty and
+# undecided cells known so far) and the grid if one was found. Parsing and grounding cannot be
+# interrupted, so the service itself only gives up GRACE seconds later.
+
+PROGRAMS = {}  # program path -> text, read once per worker process
+
+WARMUP = "R>\nR>\n2 0\n1 1\n"
+
+GRACE = 5.0
+
+
+def program_text(program):
+    if program not in PROGRAMS:
+        with open(program, "r", encoding="utf-8") as f:
+            PROGRAMS[program] = f.read()
+    return PROGRAMS[program]
+
+
+def warm_up():
+    # Runs once in every worker process when the pool starts
+    for program, _ in main.ENCODINGS.values():
+        program_text(program)
+    solve_request({"ascii": WARMUP})
+
+
+def solve_request(request, budget=None):
+    # Runs in a worker: parse and solve one request, returns the response (without "id")
+    start = time.perf_counter()
+    partial = {}
+    out = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):  # the parsers print their errors
+            if "ascii" in request:
+                parsed = fast_parse.parse_arrays(None, text=request["ascii"])
+                puzzle = Puzzle.from_parsed(parsed) if parsed is not None else None
+            elif "json" in request:
+                puzzle = Puzzle.from_json_data(request["json"])
+            else:
+                return {"status": "ERROR", "error": "the request needs an \"ascii\" or \"json\" instance"}
+            if puzzle is None:
+                return {"status": "ERROR", "error": out.getvalue().strip() or "instance could not be parsed"}
+
+            if request.get("solver") == "native":
+                size, fills, nummodels = native_solver.solve_puzzle(puzzle, budget, partial)
+            else:
+                encoding = request.get("encoding", "cell")
+                program, _ = main.ENCODINGS[encoding]
+                facts = main.PUZZLE_ENCODERS[encoding](puzzle)
+                size, fills, nummodels = solve_facts(facts, program, budget, partial)
+    except Exception as e:
+        return {"status": "ERROR", "error": str(e)}
+
+    status = main.status_of(nummodels, partial)
+    response = {"status": status, "n": puzzle.n,
+                "grid": main.solution_grid(size, fills) if nummodels > 0 else None,
+                "time": time.perf_counter() - start}
+    if status == "TIMEOUT":
+        response["partial"] = {key: len(partial[key]) for key in ("filled", "empty", "undecided")}
+    return response
+
+
+def solve_facts(facts, program, budget=None, partial=None):
+    # main.solve, with the encoding text kept in memory instead of loading the file every time
+    return main.solve(facts + [program_text(program)], program=None, budget=budget, partial=partial)
+
+
+class SolveService:
+    def __init__(self, workers=None, max_concurrent=None, max_pending=16, timeout=60.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_up)
+        self.slots = asyncio.Semaphore(max_concurrent or self.workers)
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.stats = {"requests": 0, "solved": 0, "errors": 0, "timeouts": 0, "in_flight": 0}
+
+    def warm(self):
+        # Start every worker now (not on the first requests)
+        for future in [self.pool.submit(time.sleep, 0) for _ in range(self.workers)]:
+            future.result()
+
+    async def handle(self, request):
+        # Response of one decoded request; an error never escapes (it would close the connection)
+        if request.get("op") == "stats":
+            return dict(self.stats)
+        self.stats["requests"] += 1
+        timeout = request.get("timeout", self.timeout)
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not timeout > 0:
+            self.stats["errors"] += 1
+            return {"status": "ERROR", "error": f"bad request: \"timeout\" must be a positive number, not {timeout!r}"}
+        try:
+            response = await self.run_in_pool(request, timeout)
+        except Exception as e:  # e.g. BrokenProcessPool
+            self.stats["errors"] += 1
+            return {"status": "ERROR", "error": f"{type(e).__name__}: {e}"}
+        if response["status"] == "TIMEOUT":
+            self.stats["timeouts"] += 1
+        else:
+            self.stats["errors" if response["status"] == "ERROR" else "solved"] += 1
+        return response
+
+    async def run_in_pool(self, request, timeout):
+        # solve_request in a worker. The slot is held until the worker is really done: when the
+        # service gives up on an answer (timeout + GRACE) the search may still be running there.
+        loop = asyncio.get_running_loop()
+        await self.slots.acquire()
+        try:
+            future = self.pool.submit(solve_request, request, timeout)
+        except BaseException:
+            self.slots.release()
+            raise
+        self.stats["in_flight"] += 1
+
+        def release(_):
+            self.stats["in_flight"] -= 1
+            self.slots.release()
+
+        def done(f):  # in a thread of the pool
+            with contextlib.suppress(RuntimeError):  # the loop is already closed
+                loop.call_soon_threadsafe(release, f)
+
+        future.add_done_callback(done)
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout + GRACE)
+        except asyncio.TimeoutError:
+            return {"status": "TIMEOUT", "error": f"no answer after {timeout + GRACE}s"}
+
+    async def serve_stream(self, reader, writer):
+        # One connection: read requests while fewer than max_pending are unanswered
+        pending = asyncio.Semaphore(self.max_pending)
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line):
+            try:
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("a request is a JSON object")
+                except ValueError as e:
+                    request = {}
+                    response = {"status": "ERROR", "error": f"bad request: {e}"}
+                else:
+                    response = await self.handle(request)
+                if "id" in request:
+                    response = {"id": request["id"], **response}
+                async with lock:
+                    writer.write((json.dumps(response) + "\n").encode("utf-8"))
+                    await writer.drain()
+            finally:
+                pending.release()
+
+        try:
+            while True:
+                await pending.acquire()
+                line = await reader.readline()
+                if not line:
+                    pending.release()
+                    break
+                if not line.strip():
+                    pending.release()
+                    continue
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            for task in tasks:
+                task.cancel()
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+class FileWriter:
+    # The part of asyncio.StreamWriter used by serve_stream, on a regular file (> responses.jsonl)
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, data):
+        self.f.write(data)
+
+    async def drain(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.flush()
+
+
+def feed_lines(loop, reader, f):
+    # Runs in a thread: give the lines of a regular file to an asyncio.StreamReader
+    for line in f:
+        loop.call_soon_threadsafe(reader.feed_data, line)
+    loop.call_soon_threadsafe(reader.feed_eof)
+
+
+async def stdio_streams():
+    # asyncio reader/writer on stdin/stdout. Pipe transports only take pipes, sockets and
+    # terminals: a regular file (< requests.jsonl, > responses.jsonl) is read on a thread,
+    # or written directly.
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=2 ** 26)
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except ValueError:
+        threading.Thread(target=feed_lines, args=(loop, reader, sys.stdin.buffer), daemon=True).start()
+    try:
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    except ValueError:
+        return reader, FileWriter(sys.stdout.buffer)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    return reader, writer
+
+
+async def serve(args):
+    service = SolveService(args.workers, args.max_concurrent, args.max_pending, args.timeout)
+    service.warm()
+    try:
+        if args.stdio:
+            reader, writer = await stdio_streams()
+            await service.serve_stream(reader, writer)
+            return
+        if args.unix:
+            server = await asyncio.start_unix_server(service.serve_stream, path=args.unix, limit=2 ** 26)
+            where = args.unix
+        else:
+            host, port = args.tcp.rsplit(":", 1)
+            server = await asyncio.start_server(service.serve_stream, host, int(port), limit=2 ** 26)
+            where = args.tcp
+        print(f"Solve service on {where} with {service.workers} workers", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+async def send(args):
+    # Client: send the instances, print one response per line
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix, limit=2 ** 26)
+    else:
+        host, port = args.tcp.rsplit(":", 1)
+        reader, writer = await asyncio.open_connection(host, int(port), limit=2 ** 26)
+    for i, path in enumerate(args.send):
+        with open(path, "r", encoding="utf-8") as f:
+            request = {"id": i, "ascii": f.read()}
+        if args.timeout is not None:
+            request["timeout"] = args.timeout
+        writer.write((json.dumps(request) + "\n").encode("utf-8"))
+    await writer.drain()
+    for _ in args.send:
+        response = json.loads(await reader.readline())
+        response["instance"] = args.send[response["id"]]
+        print(json.dumps(response))
+    writer.close()
+
+
+def main_service():
+    parser = argparse.ArgumentParser(description="Thermometers solve service (JSON lines).")
+    where = parser.add_mutually_exclusive_group(required=True)
+    where.add_argument("--tcp", metavar="HOST:PORT", help="listen on (or with --send, connect to) a TCP port")
+    where.add_argument("--unix", metavar="PATH", help="listen on (or with --send, connect to) a Unix socket")
+    where.add_argument("--stdio", action="store_true", help="serve one client on stdin/stdout")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-concurrent", type=int, default=None,
+                        help="requests solved at once (default: number of workers)")
+    parser.add_argument("--max-pending", type=int, default=16,
+                        help="unanswered requests per connection before reading pauses")
+    parser.add_argument("--timeout", type=float, default=None, help="time limit per request in seconds (default 60)")
+    parser.add_argument("--send", nargs="+", metavar="TXT", default=None,
+                        help="client mode: send these ASCII instances to the service and print the answers")
+    args = parser.parse_args()
+
+    if args.send is not None:
+        if args.stdio:
+            parser.error("--send needs --tcp or --unix")
+        asyncio.run(send(args))
+        return
+    if args.timeout is None:
+        args.timeout = 60.0
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main_service()
@@ -7,16 +7,6 @@ import os
 import json
 import sys
 
-file_name = input("Enter the name of the input file (for example, dom01): ")
-output_file = file_name 
-file_name = file_name + ".txt"
-output_file = output_file + ".json"
-
-in_path = os.path.join(".", "examplesthermo", file_name)
-output_dir = os.path.join(".", "examplesthermo")
-
-out_path = os.path.join(output_dir, output_file)
-
 symbols = {"^" : (-1,0), "v" : (1,0), "<" : (0,-1), ">" : (0,1)}
 bulbs = {"U" : (-1,0), "D" : (1,0), "L" : (0,-1), "R" : (0,1)}
 
@@ -131,19 +121,8 @@ def thermos(grid):  # Find bulbs, build complete paths, and validate that they n
                     
     return found_bulbs, thermo_paths  
 
-def main():
-    instance_data = read_instance(in_path)
-    if instance_data is None:
-        print("Error reading instance file. Exiting.")
-        return
-    grid, col_sums, row_sums = instance_data
-
-    thermos_data = thermos(grid)
-    if thermos_data is None:
-        print("Error processing thermometers. Exiting.")
-        return
-    found_bulbs, thermo_paths = thermos_data
-
+def to_json_data(grid, col_sums, row_sums, found_bulbs, thermo_paths):
+    # Build the dictionary that is saved as the JSON instance (and read by encode.py)
     n = len(grid)
     bulbs_json = []
     for (r, c, dr, dc) in found_bulbs:
@@ -163,14 +142,46 @@ def main():
         "thermometers": thermos_json,
         "row_targets": row_sums,
         "col_targets": col_sums}
+    return data
+
+def load_instance(path):
+    # Read the ASCII file and return the JSON data (in memory), or None on error
+    instance_data = read_instance(path)
+    if instance_data is None:
+        print("Error reading instance file. Exiting.")
+        return None
+    grid, col_sums, row_sums = instance_data
+
+    thermos_data = thermos(grid)
+    if thermos_data is None:
+        print("Error processing thermometers. Exiting.")
+        return None
+    found_bulbs, thermo_paths = thermos_data
+
+    return to_json_data(grid, col_sums, row_sums, found_bulbs, thermo_paths)
+
+def main():
+    file_name = input("Enter the name of the input file (for example, dom01): ")
+    output_file = file_name 
+    file_name = file_name + ".txt"
+    output_file = output_file + ".json"
+
+    in_path = os.path.join(".", "examplesthermo", file_name)
+    output_dir = os.path.join(".", "examplesthermo")
+
+    out_path = os.path.join(output_dir, output_file)
+
+    data = load_instance(in_path)
+    if data is None:
+        return
     
     with open(out_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
     print("Converion succeeded.")
     print(f"json file saved in {out_path}")
-    print(f"Size of the grid: {n}x{n}")
-    print(f"There are {len(thermos_json)} termometers.")
+    print(f"Size of the grid: {data['n']}x{data['n']}")
+    print(f"There are {len(data['thermometers'])} termometers.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,16 +2,6 @@ import sys
 import json
 import os
 
-file_name = input("Enter the name of the input file (for example, dom07):")
-output_file = file_name 
-file_name = file_name + ".txt"
-output_file = output_file + ".json"
-
-in_path = os.path.join(".", "examplesthermo_curved", file_name)
-output_dir = os.path.join(".", "examplesthermo_curved")
-
-out_path = os.path.join(output_dir, output_file)
-
 # SYMBOLS
 ARROWS = {'^': (-1, 0), 'v': (1, 0), '>': (0, 1), '<': (0, -1)}
 
@@ -149,17 +139,12 @@ def build_thermos(grid):
                     
     return bulbs, thermo_paths
 
-def main():
-    grid, col_sums, row_sums = read_instance(in_path)
-
-    bulbs, thermo_paths = build_thermos(grid)
-
-    # JSON Format
+def to_json_data(grid, col_sums, row_sums, bulbs, thermo_paths):
     n = len(grid)
     bulbs_json = [{"r": r, "c": c, "dr": dr, "dc": dc} for (r, c, dr, dc) in bulbs]
     thermos_json = [[{"r": rr, "c": cc} for (rr, cc) in path] for path in thermo_paths]
 
-    obj = {
+    return {
         "n": n,
         "grid": grid,
         "bulbs": bulbs_json,
@@ -167,14 +152,37 @@ def main():
         "row_targets": row_sums,
         "col_targets": col_sums
     }
+
+def load_instance(path):
+    """
+    Read an ASCII instance (straight or curved) and return its JSON data in memory.
+    """
+    grid, col_sums, row_sums = read_instance(path)
+    bulbs, thermo_paths = build_thermos(grid)
+    return to_json_data(grid, col_sums, row_sums, bulbs, thermo_paths)
+
+def main():
+    file_name = input("Enter the name of the input file (for example, dom07):")
+    output_file = file_name 
+    file_name = file_name + ".txt"
+    output_file = output_file + ".json"
+
+    in_path = os.path.join(".", "examplesthermo_curved", file_name)
+    output_dir = os.path.join(".", "examplesthermo_curved")
+
+    out_path = os.path.join(output_dir, output_file)
+
+    # JSON Format
+    obj = load_instance(in_path)
+
     # Save JSON file
     with open(out_path, 'w', encoding='utf-8') as f:
         json.dump(obj, f, ensure_ascii=False, indent=2)
 
     print("Conversion completed successfully.")
     print(f"JSON file saved to: {out_path}")
-    print(f"Grid size: {n}x{n}")
-    print(f"{len(thermos_json)} thermometers detected.")
+    print(f"Grid size: {obj['n']}x{obj['n']}")
+    print(f"{len(obj['thermometers'])} thermometers detected.")
 
 if __name__ == "__main__":
     main()
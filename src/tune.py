@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import main
+import batch
+import generate
+import fast_parse
+from puzzle import Puzzle
+
+# Solver settings tuner for thermo.lp.
+#
+# Every candidate (clingo --configuration, --heuristic and optional #heuristic directives) solves
+# the whole corpus as main.py does (ground + search for two models). The candidates run in
+# parallel, one per worker process. Score = mean + p95 of the per-instance times; an instance
+# that hits --cutoff counts as the cutoff. A candidate is aborted as soon as its running total
+# exceeds --abort times the total of the best candidate that already finished.
+#
+# The best settings are written to solver_config.json (main.TUNING_FILE), which main.py loads
+# automatically:
+#   {"configuration": "trendy", "heuristic": "Domain", "directives": "long", "program": "...", ...}
+#
+#   python src/tune.py examplesthermo/ examplesthermo_curved/ --sizes 30 60 -w 4
+
+# #heuristic directives for thermo.lp (they only act with --heuristic=Domain)
+DIRECTIVES = {
+    "none": "",
+    # a bulb decides its whole thermometer when it is empty
+    "bulbs": "#heuristic fill(R,C) : bulb(R,C). [1, level]\n",
+    # cells of long thermometers first (each cell reaches the bulb of its thermometer)
+    "long": (
+        "tune_reach(R,C,R,C) :- bulb(R,C).\n"
+        "tune_reach(R,C,BR,BC) :- prev(R,C,PR,PC), tune_reach(PR,PC,BR,BC).\n"
+        "tune_len(BR,BC,L) :- bulb(BR,BC), L = #count { R,C : tune_reach(R,C,BR,BC) }.\n"
+        "#heuristic fill(R,C) : tune_reach(R,C,BR,BC), tune_len(BR,BC,L). [L, level]\n"
+    ),
+    # rows and columns whose target is close to 0 or to their number of cells first
+    "tight": (
+        "tune_row(R,N) :- row_target(R,_), N = #count { C : cell(R,C) }.\n"
+        "tune_col(C,N) :- col_target(C,_), N = #count { R : cell(R,C) }.\n"
+        "#heuristic fill(R,C) : cell(R,C), row_target(R,K), tune_row(R,N). [|N-2*K|, level]\n"
+        "#heuristic fill(R,C) : cell(R,C), col_target(C,K), tune_col(C,N). [|N-2*K|, level]\n"
+    ),
+}
+
+CONFIGURATIONS = ["auto", "frumpy", "jumpy", "tweety", "handy", "crafty", "trendy"]
+HEURISTICS = [None, "Berkmin", "Vsids", "Vmtf"]
+
+_corpus = []  # [(name, facts)] of this worker process
+_best = None  # shared total of the best finished candidate
+
+
+def candidates():
+    # Every configuration with every plain heuristic, and with each set of directives (Domain)
+    for configuration, heuristic in itertools.product(CONFIGURATIONS, HEURISTICS):
+        yield {"configuration": configuration, "heuristic": heuristic, "directives": "none"}
+    for configuration, directives in itertools.product(CONFIGURATIONS, sorted(DIRECTIVES)):
+        if directives != "none":
+            yield {"configuration": configuration, "heuristic": "Domain", "directives": directives}
+
+
+def tuning_of(candidate):
+    # The settings main.solve() takes (tuning=...)
+    return {**candidate, "program": DIRECTIVES[candidate["directives"]]}
+
+
+def load_corpus(paths, sizes, count, seed):
+    # [(name, ASCII text)]: the instance files and count random instances of every size
+    corpus = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            corpus.append((path, f.read()))
+    rnd = random.Random(seed)
+    for n in sizes:
+        for i in range(count):
+            corpus.append((f"random-{n}-{i}", generate.random_instance(n, seed=rnd.randrange(2 ** 31))))
+    return corpus
+
+
+def init_worker(corpus, best):
+    global _best
+    _best = best
+    for name, text in corpus:
+        parsed = fast_parse.parse_arrays(None, text=text)
+        if parsed is not None:
+            _corpus.append((name, main.PUZZLE_ENCODERS["cell"](Puzzle.from_parsed(parsed))))
+
+
+def evaluate(candidate, cutoff, abort):
+    # Runs in a worker: solve the corpus with one candidate. Returns the candidate with its times.
+    tuning = tuning_of(candidate)
+    times = []
+    timeouts = 0
+    for name, facts in _corpus:
+        start = time.perf_counter()
+        try:
+            main.solve(facts, main.THERMO, budget=cutoff, tuning=tuning)  # no partial: no extra propagator
+        except TimeoutError:
+            pass  # counted from the time below
+        elapsed = time.perf_counter() - start
+        times.append(min(elapsed, cutoff))
+        timeouts += elapsed >= cutoff
+        if sum(times) > abort * _best.value:
+            return {**candidate, "aborted": True, "solved": len(times), "total": sum(times)}
+    total = sum(times)
+    with _best.get_lock():
+        _best.value = min(_best.value, total)
+    times.sort()
+    mean = total / len(times)
+    p95 = times[min(len(times) - 1, int(0.95 * len(times)))]
+    return {**candidate, "aborted": False, "solved": len(times), "timeouts": timeouts,
+            "total": total, "mean": mean, "p95": p95, "score": mean + p95}
+
+
+def tune(corpus, workers=None, cutoff=10.0, abort=2.0):
+    # Evaluate all candidates; returns the finished ones sorted by score, and the aborted ones
+    best = multiprocessing.Value("d", float("inf"))
+    finished, aborted = [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(corpus, best)) as pool:
+        futures = [pool.submit(evaluate, candidate, cutoff, abort) for candidate in candidates()]
+        for future in as_completed(futures):
+            result = future.result()
+            (aborted if result["aborted"] else finished).append(result)
+            label = f"{result['configuration']}/{result['heuristic']}/{result['directives']}"
+            if result["aborted"]:
+                print(f"  {label:<28} aborted after {result['solved']} instances")
+            else:
+                print(f"  {label:<28} mean={result['mean']:.4f}s p95={result['p95']:.4f}s "
+                      f"timeouts={result['timeouts']}")
+    finished.sort(key=lambda result: (result["timeouts"], result["score"]))
+    return finished, aborted
+
+
+def main_tune():
+    parser = argparse.ArgumentParser(description="Tune the clingo settings of thermo.lp over a corpus.")
+    parser.add_argument("instances", nargs="*", default=[main.EXAMPLES_DIR],
+                        help="instances, folders or globs (default: examplesthermo/)")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[], help="also solve random grids of these sizes")
+    parser.add_argument("--count", type=int, default=5, help="random grids per size (default 5)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random grids")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--cutoff", type=float, default=10.0, help="time limit per instance in seconds (default 10)")
+    parser.add_argument("--abort", type=float, default=2.0,
+                        help="abort a candidate slower than this factor times the best total (default 2)")
+    parser.add_argument("-o", "--output", default=main.TUNING_FILE,
+                        help="settings file (default: solver_config.json, loaded by main.py)")
+    args = parser.parse_args()
+
+    paths = [path for pattern in args.instances for path in batch.find_instances(pattern)]
+    corpus = load_corpus(paths, args.sizes, args.count, args.seed)
+    if not corpus:
+        print("No instances to tune on.")
+        sys.exit(1)
+
+    print(f"Tuning on {len(corpus)} instances...")
+    start = time.perf_counter()
+    finished, aborted = tune(corpus, args.workers, args.cutoff, args.abort)
+    if not finished:
+        print("No candidate finished.")
+        sys.exit(1)
+    best = finished[0]
+    default = next((r for r in finished + aborted if r["configuration"] == "auto" and r["heuristic"] is None
+                    and r["directives"] == "none"), None)
+    print(f"\n{len(finished)} candidates finished, {len(aborted)} aborted in {time.perf_counter() - start:.1f}s")
+    print(f"Best: --configuration={best['configuration']} heuristic={best['heuristic']} "
+          f"directives={best['directives']}: mean={best['mean']:.4f}s p95={best['p95']:.4f}s")
+    if default is not None and not default["aborted"]:
+        print(f"Clingo defaults: mean={default['mean']:.4f}s p95={default['p95']:.4f}s")
+
+    settings = tuning_of({key: best[key] for key in ("configuration", "heuristic", "directives")})
+    settings["measured"] = {"instances": len(corpus), "mean": best["mean"], "p95": best["p95"],
+                            "default_mean": default["mean"] if default and not default["aborted"] else None}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2)
+    print(f"Settings saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main_tune()
@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import numpy as np
+
+import main
+from puzzle import Puzzle
+
+# Solution checker with NumPy only (no Clingo, nothing is grounded).
+#
+# A solution is an n x n boolean grid (True = filled), as in solutions/solution_*.txt ('x' / '.').
+# Many solutions of the same instance are checked at once as a stacked k x n x n array:
+#   shape     the solution is an n x n grid (rows of the same length)
+#   rows      every row has its target number of filled cells
+#   cols      every column has its target number of filled cells
+#   cells     no filled cell is outside a thermometer
+#   thermos   every filled cell has its previous cell filled (prev/4: a thermometer is filled
+#             from the bulb, without gaps)
+#
+#   python src/validate.py examplesthermo/dom06.txt solutions/solution_dom06.txt
+#   python src/validate.py big.txt stacked.npy            (a saved k x n x n array)
+
+CHECKS = ("shape", "rows", "cols", "cells", "thermos")
+CHUNK = 65536  # solutions read and checked at a time by the CLI
+
+
+def as_puzzle(instance):
+    # A puzzle.Puzzle from a Puzzle, the JSON data of step_1.py, or an instance file (ASCII, .thb, .json)
+    if isinstance(instance, Puzzle):
+        return instance
+    if isinstance(instance, dict):
+        return Puzzle.from_json_data(instance)
+    if instance.endswith(".json"):
+        with open(instance, "r", encoding="utf-8") as f:
+            return Puzzle.from_json_data(json.load(f))
+    return main.parse_instance(instance, as_puzzle=True)
+
+
+def to_grids(solutions, n):
+    # (k x n x n bool array, k bool array "shape") from one grid or many: rows of 'x' / '.', 2D or
+    # 3D arrays. A solution that is not an n x n grid (ragged rows, other size) is stacked as an
+    # empty grid with shape False.
+    if isinstance(solutions, np.ndarray) and solutions.ndim == 3:
+        grids = np.asarray(solutions, dtype=bool)
+        ok = grids.shape[1:] == (n, n)
+        if not ok:
+            grids = np.zeros((len(grids), n, n), dtype=bool)
+        return grids, np.full(len(grids), ok)
+    if isinstance(solutions, np.ndarray) or is_rows(solutions):
+        solutions = [solutions]  # one grid
+    grids = np.zeros((len(solutions), n, n), dtype=bool)
+    shape = np.zeros(len(solutions), dtype=bool)
+    for i, solution in enumerate(solutions):
+        grid = grid_array(solution) if is_rows(solution) else np.asarray(solution, dtype=bool)
+        if grid is not None and grid.shape == (n, n):
+            grids[i] = grid
+            shape[i] = True
+    return grids, shape
+
+
+def is_rows(solution):
+    # True for the rows of a solution file (strings), False for an array
+    return isinstance(solution, (list, tuple)) and len(solution) > 0 and isinstance(solution[0], str)
+
+
+def grid_array(rows):
+    # n x n bool array of the rows of a solution file, None if the rows differ in length
+    if len({len(row) for row in rows}) > 1:
+        return None
+    text = "".join(rows).encode("ascii", "replace")
+    return (np.frombuffer(text, dtype=np.uint8) == ord("x")).reshape(len(rows), -1)
+
+
+def read_solution(path):
+    # Rows of a solution file (the format of main.py and drawthermo.py)
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return [line.strip().replace(" ", "") for line in f if line.strip() != ""]
+
+
+def validate(puzzle, solutions):
+    # {check: k bool array} for every check of CHECKS, and "valid" (all of them).
+    # puzzle: anything as_puzzle() takes; solutions: anything to_grids() takes. A solution that
+    # is not an n x n grid fails the "shape" check, and with it every other check.
+    puzzle = as_puzzle(puzzle)
+    if puzzle is None:
+        raise ValueError("the instance could not be parsed")
+    n = puzzle.n
+    grids, shape = to_grids(solutions, n)
+    k = len(grids)
+
+    result = {
+        "shape": shape,
+        "rows": (grids.sum(axis=2, dtype=np.int32) == puzzle.row_targets).all(axis=1),
+        "cols": (grids.sum(axis=1, dtype=np.int32) == puzzle.col_targets).all(axis=1),
+    }
+    flat = grids.reshape(k, n * n)
+    result["cells"] = ~flat[:, puzzle.thermo_of < 0].any(axis=1)
+
+    # entry i (not a bulb) follows entry i-1 in the same thermometer
+    along = flat[:, puzzle.cells]
+    follows = np.ones(len(puzzle.cells), dtype=bool)
+    follows[puzzle.offsets[:-1]] = False
+    gaps = along[:, 1:] & ~along[:, :-1] & follows[1:]
+    result["thermos"] = ~gaps.any(axis=1)
+
+    for check in CHECKS[1:]:
+        result[check] &= shape
+    result["valid"] = result["rows"] & result["cols"] & result["cells"] & result["thermos"]
+    return result
+
+
+def errors(puzzle, solution):
+    # Readable list of what is wrong with one solution ([] if it is valid)
+    puzzle = as_puzzle(puzzle)
+    if puzzle is None:
+        raise ValueError("the instance could not be parsed")
+    n = puzzle.n
+    if is_rows(solution):
+        grid = grid_array(solution)
+        if grid is None:
+            return [f"the rows of the solution have different lengths: {sorted({len(row) for row in solution})}"]
+    else:
+        grid = np.asarray(solution, dtype=bool)
+    if grid.shape != (n, n):
+        return [f"the solution is {'x'.join(map(str, grid.shape))}, the instance is {n}x{n}"]
+    found = []
+    for r in np.flatnonzero(grid.sum(axis=1) != puzzle.row_targets).tolist():
+        found.append(f"row {r}: {int(grid[r].sum())} filled cells, target {int(puzzle.row_targets[r])}")
+    for c in np.flatnonzero(grid.sum(axis=0) != puzzle.col_targets).tolist():
+        found.append(f"column {c}: {int(grid[:, c].sum())} filled cells, target {int(puzzle.col_targets[c])}")
+    flat = grid.reshape(-1)
+    for cell in np.flatnonzero(flat & (puzzle.thermo_of < 0)).tolist():
+        found.append(f"cell {divmod(cell, n)}: filled outside a thermometer")
+    for cell in np.flatnonzero(flat & (puzzle.pos_of > 0)).tolist():
+        t, pos = int(puzzle.thermo_of[cell]), int(puzzle.pos_of[cell])
+        if not flat[puzzle.cells[puzzle.offsets[t] + pos - 1]]:
+            found.append(f"cell {divmod(cell, n)}: filled, but not the cell before it in its thermometer")
+    return found
+
+
+def iter_chunks(paths, size=CHUNK):
+    # Yield (names, solutions) of the solution files (rows) or .npy stacks (k x n x n arrays),
+    # size solutions at a time
+    for path in paths:
+        if path.endswith(".npy"):
+            stack = np.load(path, mmap_mode="r")
+            for start in range(0, len(stack), size):
+                chunk = np.asarray(stack[start:start + size], dtype=bool)
+                yield [f"{path}[{start + i}]" for i in range(len(chunk))], chunk
+    files = [path for path in paths if not path.endswith(".npy")]
+    for start in range(0, len(files), size):
+        names = files[start:start + size]
+        yield names, [read_solution(path) for path in names]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check Thermometers solutions against their instance (NumPy).")
+    parser.add_argument("instance", help="ASCII, .thb or JSON instance")
+    parser.add_argument("solutions", nargs="+",
+                        help="solution files, folders (every .txt inside), globs or .npy stacks (k x n x n)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="explain every invalid solution")
+    args = parser.parse_args()
+
+    puzzle = as_puzzle(args.instance)
+    if puzzle is None:
+        sys.exit(1)
+    paths = []
+    for pattern in args.solutions:
+        paths += sorted(glob.glob(os.path.join(pattern, "*.txt"))) if os.path.isdir(pattern) else sorted(glob.glob(pattern))
+    if not paths:
+        print(f"No solutions found: {' '.join(args.solutions)}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    total = invalid = 0
+    for names, grids in iter_chunks(paths):
+        result = validate(puzzle, grids)
+        total += len(grids)
+        for i in np.flatnonzero(~result["valid"]).tolist():
+            invalid += 1
+            failed = [check for check in CHECKS if not result[check][i]]
+            if not result["shape"][i]:
+                failed = ["shape"]  # the other checks fail with it
+            print(f"{names[i]}: INVALID ({', '.join(failed)})")
+            if args.verbose:
+                for error in errors(puzzle, grids[i]):
+                    print(f"  {error}")
+    print(f"{total - invalid} valid, {invalid} invalid in {time.perf_counter() - start:.3f}s")
+    sys.exit(0 if invalid == 0 else 1)
@@ -0,0 +1,97 @@
+import sys
+import json
+import time
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import main
+import batch
+import enumerate_models
+
+# Uniqueness check with a blocking constraint (multi-shot solving on one Control).
+#
+#   1. ground the instance and ask for one model;
+#   2. add a program part "block" with one constraint that forbids exactly that fill (every
+#      filled cell filled and every other fill/2 atom false), ground only that part, and ask
+#      again whether the program is satisfiable.
+# The second search stops at its first model (not unique) or when it proves there is none
+# (unique). Only fill/2 is blocked, so with thermo_level.lp two models with the same cells
+# are the same solution.
+#
+# python src/verify.py examplesthermo/            (a folder, a glob or instances; -w workers)
+# One line per instance: UNIQUE, MULTIPLE, UNSATISFIABLE or ERROR, with the times of both solves.
+
+
+def verify_unique(facts, program=main.THERMO):
+    # {"status", "n", "grid", "first", "second"}: first/second are the seconds of both solves
+    ctl = enumerate_models.ground(facts, program, limit=1)
+    n, masks = enumerate_models.cell_index(ctl)
+    found = []
+
+    start = time.perf_counter()
+    ctl.solve(on_model=lambda model: found.append(model.symbols(shown=True)))
+    first = time.perf_counter() - start
+    result = {"status": "UNSATISFIABLE", "n": n, "grid": None, "first": first, "second": 0.0}
+    if not found:
+        return result
+
+    filled = {symbol for symbol in found[0] if symbol in masks}
+    body = [str(symbol) for symbol in filled] + [f"not {symbol}" for symbol in masks if symbol not in filled]
+    ctl.add("block", [], ":- " + ", ".join(body) + "." if body else ":- .")
+    ctl.ground([("block", [])])
+
+    start = time.perf_counter()
+    second = ctl.solve()
+    result["second"] = time.perf_counter() - start
+    result["status"] = "MULTIPLE" if second.satisfiable else "UNIQUE"
+    result["grid"] = enumerate_models.bits_to_grid(sum(masks[symbol] for symbol in filled), n)
+    return result
+
+
+def verify_instance(input_txt, encoding="cell"):
+    # Runs in a worker of verify_many: the result of verify_unique plus the instance
+    try:
+        program, facts = enumerate_models.facts_of(input_txt, encoding)
+        if facts is None:
+            return {"instance": input_txt, "status": "ERROR", "error": "instance could not be parsed"}
+        return {"instance": input_txt, **verify_unique(facts, program)}
+    except (Exception, SystemExit) as e:  # the parsers call sys.exit on bad input
+        return {"instance": input_txt, "status": "ERROR", "error": str(e)}
+
+
+def verify_many(instances, workers=None, encoding="cell"):
+    # Yield the results of many instances (in input order), checked by a pool of workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(partial(verify_instance, encoding=encoding), instances)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that Thermometers instances have exactly one solution.")
+    parser.add_argument("instances", nargs="+", help="instances, folders (every .txt inside) or globs")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--encoding", choices=sorted(main.ENCODINGS), default="cell", help="ASP encoding")
+    parser.add_argument("--jsonl", metavar="FILE", default=None, help="also save the results as JSON lines")
+    args = parser.parse_args()
+
+    instances = [path for pattern in args.instances for path in batch.find_instances(pattern)]
+    if not instances:
+        print(f"No instances found: {' '.join(args.instances)}")
+        sys.exit(1)
+
+    out = open(args.jsonl, "w", encoding="utf-8") if args.jsonl else None
+    counts = {}
+    for result in verify_many(instances, args.workers, args.encoding):
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        if result["status"] == "ERROR":
+            print(f"{result['instance']}: ERROR ({result['error']})")
+        else:
+            print(f"{result['instance']}: {result['status']} "
+                  f"({result['first']:.3f}s + {result['second']:.3f}s)")
+        if out is not None:
+            out.write(json.dumps(result) + "\n")
+    if out is not None:
+        out.close()
+        print(f"Results saved: {args.jsonl}")
+    print(", ".join(f"{status}: {k}" for status, k in sorted(counts.items())))
+    sys.exit(0 if set(counts) == {"UNIQUE"} else 1)
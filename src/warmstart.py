@@ -0,0 +1,54 @@
+import os
+
+# Warm start from a previous solution (after a small edit, the old grid is nearly right).
+#
+# The old filled cells become hint/2 facts, and #heuristic directives make them the preferred
+# truth value of the decisions (--heuristic=Domain): clasp first tries the old fill for every
+# cell it branches on. These are only preferences, never constraints, so a wrong or outdated
+# hint cannot make the program inconsistent: the search just backtracks from it as from any
+# other bad guess, and the result is the same as without hint.
+#
+# The hint helps to find the first model (no conflicts at all when the edit still allows the
+# old fill nearby). The uniqueness check, which looks for a second model, is steered towards the
+# model it has just found and can get slower: compare with main.py --hint --compare-hint.
+
+HEURISTICS = {
+    # thermo.lp: the value of each cell
+    "cell": (
+        "#defined hint/2.\n"
+        "#heuristic fill(R,C) : hint(R,C). [1, true]\n"
+        "#heuristic fill(R,C) : cell(R,C), not hint(R,C). [1, false]\n"
+    ),
+    # thermo_level.lp: the level of each thermometer, as the number of hinted cells in it
+    "thermo": (
+        "#defined hint/2.\n"
+        "hint_level(T,K) :- thermo(T,_), K = #count { I : tcell(T,I,R,C), hint(R,C) }.\n"
+        "#heuristic level(T,K) : hint_level(T,K). [1, true]\n"
+    ),
+}
+
+
+def read_grid(path):
+    # Rows of a solutions/solution_*.txt file, or None if there is none
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def hint_program(grid, encoding="cell"):
+    # Program text (hint/2 facts + directives) for a grid of 'x' (filled) and '.' (empty)
+    facts = [f"hint({r},{c})." for r, row in enumerate(grid) for c, ch in enumerate(row) if ch == "x"]
+    return "\n".join(facts) + "\n" + HEURISTICS[encoding]
+
+
+def compare(with_hint, without_hint):
+    # Text table of the clingo statistics of both searches (profiling.clingo_stats)
+    lines = [f"{'':<12}{'hint':>12}{'no hint':>12}"]
+    for key in ("choices", "conflicts", "restarts", "time_solve"):
+        a, b = with_hint[key], without_hint[key]
+        if isinstance(a, float):
+            lines.append(f"{key:<12}{a:>11.4f}s{b:>11.4f}s")
+        else:
+            lines.append(f"{key:<12}{a:>12}{b:>12}")
+    return "\n".join(lines)
@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import multiprocessing
+
+import main
+import batch
+import deadline
+
+# Batch solving spread over several machines through a work queue in a shared folder (NFS, SMB, ...).
+#
+# queue/
+#   queue.json        settings (solver, budget, lease, attempts) and the instances, in order
+#   todo/<id>.json    tasks waiting for a worker: {"id", "instance", "attempt"}
+#   leased/<id>.json  tasks being solved; the modification time is the last heartbeat
+#   done/<id>.json    results (the JSON lines of batch.py, plus "worker" and "attempt")
+#
+# Every step is an atomic rename, so there are no locks: a worker claims a task by renaming it
+# from todo/ to leased/ (only one rename succeeds), and keeps touching it while it solves. A
+# lease not touched for `lease` seconds (by the clock of the file server, see server_now) belongs
+# to a dead worker (or machine): any worker moves it back to todo/ with one more attempt, and
+# after `attempts` attempts it is given up as an ERROR result. A slow worker whose lease was
+# taken still writes its result; the first result of a task is the one kept. merge() writes the
+# results as one JSONL in the input order.
+#
+#   python src/workqueue.py init queue/ 'corpus/*.txt' --budget auto     (once)
+#   python src/workqueue.py work queue/ -w 8                             (on every machine)
+#   python src/workqueue.py merge queue/ -o solutions/batch.jsonl
+#   python src/workqueue.py run queue/ 'corpus/*.txt' -w 4               (all three, on this machine)
+# The instance paths are stored absolute: every machine must see the corpus at the same path.
+
+LEASE = 60.0       # seconds without heartbeat before a lease is taken back
+ATTEMPTS = 3       # attempts per task before it is given up
+POLL = 1.0         # seconds between two looks at the queue when there is nothing to claim
+
+
+def task_path(queue_dir, state, task_id):
+    return os.path.join(queue_dir, state, task_id + ".json")
+
+
+def write_json(path, data):
+    # Atomic: the file appears complete or not at all
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):  # gone, or replaced meanwhile
+        return None
+
+
+def init_queue(queue_dir, instances, solver="clingo", budget=None, lease=LEASE, attempts=ATTEMPTS):
+    # Create the queue with one task per instance
+    for state in ("todo", "leased", "done"):
+        os.makedirs(os.path.join(queue_dir, state), exist_ok=True)
+    instances = [os.path.abspath(path) for path in instances]
+    ids = [f"{i:08d}" for i in range(len(instances))]
+    write_json(os.path.join(queue_dir, "queue.json"),
+               {"solver": solver, "budget": budget, "lease": lease, "attempts": attempts,
+                "tasks": [{"id": task_id, "instance": path} for task_id, path in zip(ids, instances)]})
+    for task_id, path in zip(ids, instances):
+        write_json(task_path(queue_dir, "todo", task_id), {"id": task_id, "instance": path, "attempt": 1})
+    return ids
+
+
+def settings(queue_dir):
+    config = read_json(os.path.join(queue_dir, "queue.json"))
+    if config is None:
+        raise FileNotFoundError(f"No queue in {queue_dir} (see: workqueue.py init)")
+    return config
+
+
+def server_now(queue_dir):
+    # The current time of the file server: the mtime of a file just written there. Leases are
+    # compared with it, not with time.time(), so clocks that differ between machines do not matter.
+    clock = os.path.join(queue_dir, "leased", f".clock.{socket.gethostname()}.{os.getpid()}")
+    with open(clock, "w"):
+        pass
+    now = os.stat(clock).st_mtime
+    os.remove(clock)
+    return now
+
+
+def reclaim(queue_dir, lease, attempts, worker):
+    # Move the expired leases back to todo/ (or give them up). Returns the number of tasks moved.
+    # A task is first renamed to leased/<id>.json.<host>.<pid>.reclaim (only one process gets it)
+    # and touched; a .reclaim file older than lease was left by a process that died meanwhile,
+    # and is put back in leased/ as an expired lease, taken again by the next pass.
+    moved = 0
+    now = server_now(queue_dir)
+    for e in os.scandir(os.path.join(queue_dir, "leased")):
+        try:
+            expired = now - e.stat().st_mtime >= lease
+        except FileNotFoundError:
+            continue
+        if e.name.endswith(".reclaim") and expired:
+            try:
+                os.rename(e.path, os.path.join(queue_dir, "leased", e.name.split(".json.")[0] + ".json"))
+            except FileNotFoundError:
+                pass
+            continue
+        if not e.name.endswith(".json") or not expired:
+            continue
+        taken = f"{e.path}.{socket.gethostname()}.{os.getpid()}.reclaim"
+        try:
+            os.rename(e.path, taken)  # only one process gets it
+            os.utime(taken)  # not a leftover of a dead process
+            with open(taken, "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:  # finished or reclaimed meanwhile
+            continue
+        try:
+            task = json.loads(text)
+        except ValueError:
+            task = None
+        task_id = e.name[:-len(".json")]
+        if task is not None and os.path.exists(task_path(queue_dir, "done", task_id)):
+            pass  # the worker finished just now
+        elif task is None or task["attempt"] >= attempts:
+            write_json(task_path(queue_dir, "done", task_id),
+                       {"instance": task["instance"] if task else None, "status": "ERROR", "n": None, "grid": None,
+                        "error": f"lease expired {attempts} times (worker lost)", "worker": worker,
+                        "attempt": task["attempt"] if task else None})
+        else:
+            write_json(task_path(queue_dir, "todo", task_id), {**task, "attempt": task["attempt"] + 1})
+            moved += 1
+        try:
+            os.remove(taken)
+        except FileNotFoundError:
+            pass
+    return moved
+
+
+def claim(queue_dir):
+    # Take the first task of todo/: (task, leased path), or None if todo/ is empty
+    for name in sorted(os.listdir(os.path.join(queue_dir, "todo"))):
+        if not name.endswith(".json"):
+            continue
+        todo = os.path.join(queue_dir, "todo", name)
+        leased = os.path.join(queue_dir, "leased", name)
+        try:
+            os.utime(todo)  # the lease starts now: a rename keeps the mtime of init
+            os.rename(todo, leased)
+        except FileNotFoundError:  # claimed by another worker
+            continue
+        task = read_json(leased)
+        if task is not None:
+            return task, leased
+    return None
+
+
+def heartbeat(leased, interval, stop):
+    # Runs in a thread while the task is solved (clingo releases the GIL while it searches)
+    while not stop.wait(interval):
+        try:
+            os.utime(leased)
+        except FileNotFoundError:  # taken back: the result is still written, see reclaim()
+            return
+
+
+def work(queue_dir, worker=None):
+    # Solve tasks until the queue is empty. Returns the number of tasks solved by this worker.
+    config = settings(queue_dir)
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    lease, attempts = config["lease"], config["attempts"]
+    solved = 0
+    while True:
+        reclaim(queue_dir, lease, attempts, worker)
+        claimed = claim(queue_dir)
+        if claimed is None:
+            busy = os.listdir(os.path.join(queue_dir, "leased"))
+            if not any(name.endswith((".json", ".reclaim")) for name in busy):
+                return solved
+            time.sleep(POLL)  # other workers are busy: their tasks may come back
+            continue
+        task, leased = claimed
+        done = task_path(queue_dir, "done", task["id"])
+        if not os.path.exists(done):
+            stop = threading.Event()
+            beat = threading.Thread(target=heartbeat, args=(leased, lease / 4, stop), daemon=True)
+            beat.start()
+            try:
+                result = batch.solve_instance(task["instance"], config["solver"], budget=config["budget"])
+            finally:
+                stop.set()
+                beat.join()
+            if not os.path.exists(done):  # the first result of a task is kept
+                write_json(done, {**result, "worker": worker, "attempt": task["attempt"]})
+            solved += 1
+        try:
+            os.remove(leased)
+        except FileNotFoundError:
+            pass
+
+
+def work_processes(queue_dir, workers):
+    # Run work() in `workers` processes of this machine. Returns the tasks solved by each.
+    if workers == 1:
+        return [work(queue_dir)]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(work, [queue_dir] * workers)
+
+
+def merge(queue_dir, out_jsonl):
+    # Write the results in the input order. Returns (count per status, ids not done yet)
+    config = settings(queue_dir)
+    counts = {}
+    missing = []
+    with open(out_jsonl, "w", encoding="utf-8") as f:
+        for task in config["tasks"]:
+            result = read_json(task_path(queue_dir, "done", task["id"]))
+            if result is None:
+                missing.append(task["id"])
+                continue
+            f.write(json.dumps(result) + "\n")
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return counts, missing
+
+
+def main_queue():
+    parser = argparse.ArgumentParser(description="Solve Thermometers instances with workers on several machines "
+                                                 "through a work queue in a shared folder.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("init", "run"):
+        command = commands.add_parser(name, help="create the queue" if name == "init" else
+                                      "create the queue, solve it with local workers and merge the results")
+        command.add_argument("queue", help="queue folder (shared by all machines)")
+        command.add_argument("instances", nargs="+", help="instances, folders (every .txt inside) or globs")
+        command.add_argument("--solver", choices=["clingo", "native"], default="clingo", help="solver backend")
+        command.add_argument("--budget", default=None, metavar="SECONDS",
+                             help="time limit of each search in seconds, or 'auto' (deadline.BUDGETS by grid size)")
+        command.add_argument("--lease", type=float, default=LEASE,
+                             help=f"seconds without heartbeat before a task is given to another worker ({LEASE:g})")
+        command.add_argument("--attempts", type=int, default=ATTEMPTS,
+                             help=f"attempts per task before it is given up as ERROR ({ATTEMPTS})")
+    command = commands.add_parser("work", help="solve tasks of the queue until it is empty")
+    command.add_argument("queue", help="queue folder")
+    for command in (command, commands.choices["run"]):
+        command.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                             help="worker processes on this machine (default: CPU count)")
+    command = commands.add_parser("merge", help="write the results as one JSONL, in the input order")
+    command.add_argument("queue", help="queue folder")
+    for command in (command, commands.choices["run"]):
+        command.add_argument("-o", "--output", default=os.path.join(main.SOLUTIONS_DIR, "batch.jsonl"),
+                             help="JSONL results file (default: solutions/batch.jsonl)")
+    args = parser.parse_args()
+
+    if args.command in ("init", "run"):
+        budget = args.budget
+        if budget == "auto":
+            budget = deadline.BUDGETS
+        elif budget is not None:
+            try:
+                budget = float(budget)
+            except ValueError:
+                parser.error("--budget needs a number of seconds or 'auto'")
+        instances = [path for pattern in args.instances for path in batch.find_instances(pattern)]
+        if not instances:
+            print(f"No instances found: {' '.join(args.instances)}")
+            sys.exit(1)
+        if os.path.exists(os.path.join(args.queue, "queue.json")):
+            print(f"There is already a queue in {args.queue}")
+            sys.exit(1)
+        init_queue(args.queue, instances, args.solver, budget, args.lease, args.attempts)
+        print(f"Queue created: {args.queue} ({len(instances)} tasks)")
+
+    if args.command in ("work", "run"):
+        start = time.perf_counter()
+        solved = work_processes(args.queue, args.workers)
+        print(f"{sum(solved)} tasks solved by {len(solved)} workers in {time.perf_counter() - start:.2f}s")
+
+    if args.command in ("merge", "run"):
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        counts, missing = merge(args.queue, args.output)
+        for status, k in sorted(counts.items()):
+            print(f"  {status}: {k}")
+        if missing:
+            print(f"{len(missing)} tasks not done yet (first: {missing[0]})")
+        print(f"Results saved: {args.output}")
+        sys.exit(1 if missing else 0)
+
+
+if __name__ == "__main__":
+    main_queue()
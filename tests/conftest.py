@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules of src/ import each other by name (python src/main.py runs with src/ on the path)
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+EXAMPLES_DIR = os.path.join(SRC_DIR, "..", "examplesthermo")
+sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,59 @@
+import glob
+import os
+import pytest
+
+import main
+import cache
+import validate
+from conftest import EXAMPLES_DIR
+
+INSTANCES = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.txt")) +
+                   glob.glob(os.path.join(EXAMPLES_DIR + "_curved", "*.txt")))
+
+
+def transformed(tmp_path, data, k):
+    # JSON data of symmetry k of the instance (written and parsed again as an ASCII file)
+    lines, cols, rows = cache.transform(data["grid"], data["col_targets"], data["row_targets"], k)
+    path = tmp_path / f"sym{k}.txt"
+    path.write_text("\n".join(lines) + "\n" + " ".join(map(str, cols)) + "\n" + " ".join(map(str, rows)) + "\n",
+                    encoding="utf-8")
+    return main.parse_instance(str(path))
+
+
+@pytest.mark.parametrize("path", INSTANCES, ids=os.path.basename)
+def test_symmetric_copies_share_the_entry(tmp_path, path):
+    data = main.parse_instance(path)
+    size, fills, nummodels = main.solve(main.encode.encode(data))
+    grid = main.solution_grid(size, fills)
+    solutions = cache.SolutionCache(str(tmp_path / "cache"))
+    solutions.put(data, main.status_of(nummodels), grid)
+    for k in range(len(cache.SYMMETRIES)):
+        copy = transformed(tmp_path, data, k)
+        assert copy is not None
+        status, found = solutions.get(copy)
+        assert status == "UNIQUE"
+        assert validate.errors(copy, found) == []
+    assert solutions.stats()["entries"] == 1
+
+
+def test_canonical_round_trip():
+    solution = ["x..", "xx.", "..x"]
+    for k in range(len(cache.SYMMETRIES)):
+        assert cache.from_canonical(cache.to_canonical(solution, k), k) == solution
+
+
+def test_miss_and_unsatisfiable(tmp_path):
+    data = main.parse_instance(os.path.join(EXAMPLES_DIR, "dom01.txt"))
+    solutions = cache.SolutionCache(str(tmp_path))
+    assert solutions.get(data) is None
+    solutions.put(data, "UNSATISFIABLE", None)
+    assert solutions.get(data) == ("UNSATISFIABLE", None)
+    assert solutions.stats()["hits"] == 1 and solutions.stats()["misses"] == 1
+
+
+def test_eviction_bounds_the_entries(tmp_path):
+    solutions = cache.SolutionCache(str(tmp_path), max_entries=10)
+    for i in range(25):
+        data = {"grid": ["^."[i % 2] + ".", ".."], "col_targets": [i, 0], "row_targets": [0, i]}
+        solutions.put(data, "UNSATISFIABLE", None)
+    assert solutions.count == len(solutions.entries()) <= 10
@@ -0,0 +1,49 @@
+import os
+import pytest
+
+import main
+import encode
+import deadline
+import generate
+import native_solver
+from conftest import EXAMPLES_DIR
+
+
+@pytest.fixture(scope="module")
+def large(tmp_path_factory):
+    # a grid that is not solved within a millisecond
+    path = tmp_path_factory.mktemp("deadline") / "large.txt"
+    path.write_text(generate.random_instance(60, seed=1), encoding="utf-8")
+    return main.parse_instance(str(path))
+
+
+def test_parse_budgets():
+    assert deadline.parse_budgets("10:1,30:5,*:120") == [(10, 1.0), (30, 5.0), (None, 120.0)]
+    budgets = deadline.parse_budgets("10:1,*:7.5")
+    assert deadline.default_budget(10, budgets) == 1.0
+    assert deadline.default_budget(11, budgets) == 7.5
+
+
+def test_partial_result(large):
+    partial = {}
+    main.solve(encode.encode(large), budget=0.001, partial=partial)
+    assert partial["timed_out"]
+    filled, empty = set(partial["filled"]), set(partial["empty"])
+    assert not filled & empty
+    assert not (filled | empty) & set(partial["undecided"])
+
+
+def test_timeout_is_not_unsatisfiable(large):
+    # without a partial dict a timeout cannot be told from nummodels == 0: it raises
+    with pytest.raises(TimeoutError):
+        main.solve(encode.encode(large), budget=0.001)
+    with pytest.raises(TimeoutError):
+        native_solver.solve(large, budget=0.001)
+
+
+def test_budget_large_enough():
+    data = main.parse_instance(os.path.join(EXAMPLES_DIR, "dom06.txt"))
+    partial = {}
+    result = main.solve(encode.encode(data), budget=60, partial=partial)
+    assert result == main.solve(encode.encode(data))
+    assert "timed_out" not in partial
@@ -0,0 +1,48 @@
+import glob
+import os
+import pytest
+
+import main
+import encode
+from conftest import EXAMPLES_DIR
+
+INSTANCES = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.txt")) +
+                   glob.glob(os.path.join(EXAMPLES_DIR + "_curved", "*.txt")))
+
+
+@pytest.mark.parametrize("path", INSTANCES, ids=os.path.basename)
+def test_encodings_agree(path):
+    data = main.parse_instance(path)
+    cell = main.solve(encode.encode(data), main.THERMO)
+    thermo = main.solve(encode.encode_thermo_level(data), main.THERMO_LEVEL)
+    assert thermo[2] == cell[2]
+    if cell[2] == 1:
+        assert thermo[0] == cell[0]
+        assert sorted(thermo[1]) == sorted(cell[1])
+
+
+
+@pytest.mark.parametrize("encoding", ["cell", "thermo"])
+@pytest.mark.parametrize("path", INSTANCES, ids=os.path.basename)
+def test_backend_and_text_agree(path, encoding):
+    puzzle = main.parse_instance(path, as_puzzle=True)
+    program = main.ENCODINGS[encoding][0]
+    arrays = encode.puzzle_fact_arrays(puzzle, encoding)
+    text = main.solve(main.PUZZLE_ENCODERS[encoding](puzzle), program)
+    backend = main.solve(lambda ctl: encode.add_puzzle_facts(ctl, arrays), program)
+    assert backend[2] == text[2]
+    if text[2] == 1:
+        assert backend[0] == text[0]
+        assert sorted(backend[1]) == sorted(text[1])
+
+
+@pytest.mark.parametrize("encoding", ["cell", "thermo"])
+def test_fact_stream_matches_encoder(tmp_path, encoding):
+    puzzle = main.parse_instance(os.path.join(EXAMPLES_DIR + "_curved", "dom07.txt"), as_puzzle=True)
+    arrays = encode.puzzle_fact_arrays(puzzle, encoding)
+    out_lp = str(tmp_path / "facts.lp")
+    encode.write_facts_stream(arrays, out_lp, chunk=3)
+    with open(out_lp, "r", encoding="utf-8") as f:
+        streamed = f.read().split()
+    assert sorted(streamed) == sorted(main.PUZZLE_ENCODERS[encoding](puzzle))
+    assert encode.count_facts(arrays) == len(streamed)
@@ -0,0 +1,41 @@
+import glob
+import os
+import pytest
+
+import generate
+import fast_parse
+import step_1
+import step_1_optional
+from conftest import EXAMPLES_DIR
+
+STRAIGHT = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.txt")))
+CURVED = sorted(glob.glob(os.path.join(EXAMPLES_DIR + "_curved", "*.txt")))
+
+
+@pytest.mark.parametrize("path", STRAIGHT, ids=os.path.basename)
+def test_same_data_as_step_1(path):
+    assert fast_parse.load_instance(path) == step_1.load_instance(path)
+
+
+@pytest.mark.parametrize("path", CURVED, ids=os.path.basename)
+def test_same_data_as_step_1_optional(path):
+    assert fast_parse.load_instance(path) == step_1_optional.load_instance(path)
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("turn_prob", [0.0, 0.3])
+def test_random_grids(tmp_path, seed, turn_prob):
+    path = str(tmp_path / "random.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(generate.random_instance(15, seed=seed, turn_prob=turn_prob))
+    assert fast_parse.load_instance(path) == step_1_optional.load_instance(path)
+
+
+@pytest.mark.parametrize("text", [
+    "^\n1\n",                  # too short
+    "^.\n..\n1 0\nx 0\n",      # targets are not numbers
+    "^.\n1 0\n0 1\n",          # missing grid row
+    "^\n..\n1 0\n0 1\n",       # ragged rows
+])
+def test_malformed_text(text):
+    assert fast_parse.parse_arrays(None, text) is None
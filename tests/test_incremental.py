@@ -0,0 +1,54 @@
+import os
+import pytest
+
+import main
+import incremental
+from conftest import EXAMPLES_DIR
+
+
+def test_produce_and_fresh(tmp_path):
+    manifest = incremental.Manifest(str(tmp_path / "manifest"))
+    artifact = str(tmp_path / "out.txt")
+    key = incremental.stage_key(incremental.SOLVE_SOURCES, option=1)
+    with manifest.produce(artifact, key, status="UNIQUE") as path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("x.\n")
+    assert manifest.fresh(artifact, key)["status"] == "UNIQUE"
+    assert manifest.fresh(artifact, incremental.stage_key(incremental.SOLVE_SOURCES, option=2)) is None
+    with open(artifact, "a", encoding="utf-8") as f:  # edited by hand
+        f.write(".x\n")
+    assert manifest.fresh(artifact, key) is None
+
+
+def test_failed_stage_keeps_the_artifact(tmp_path):
+    manifest = incremental.Manifest(str(tmp_path / "manifest"))
+    artifact = str(tmp_path / "out.txt")
+    with pytest.raises(RuntimeError):
+        with manifest.produce(artifact, "key") as path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("half")
+            raise RuntimeError
+    assert not os.path.exists(artifact)
+    assert manifest.entries() == []
+    assert os.listdir(tmp_path) == ["manifest"]
+
+
+def test_solve_sources_cover_the_solve_path():
+    # every module of src/ that main.py imports is hashed with the solution
+    with open(os.path.join(incremental.BASE_DIR, "main.py"), "r", encoding="utf-8") as f:
+        imported = {line.split()[1] for line in f if line.startswith(("import ", "from "))}
+    local = {name for name in imported if os.path.exists(os.path.join(incremental.BASE_DIR, name + ".py"))}
+    assert {name + ".py" for name in local - {"incremental"}} <= set(incremental.SOLVE_SOURCES)
+    assert all(version is not None for version in incremental.source_versions(incremental.SOLVE_SOURCES).values())
+
+
+def test_second_run_is_up_to_date(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(main, "SOLUTIONS_DIR", str(tmp_path / "solutions"))
+    manifest = incremental.Manifest(str(tmp_path / "manifest"))
+    instance = os.path.join(EXAMPLES_DIR, "dom01.txt")
+    grid = main.run(instance, draw=False, manifest=manifest)
+    assert "Up to date" not in capsys.readouterr().out
+    assert main.run(instance, draw=False, manifest=manifest) == grid
+    assert "Up to date (UNIQUE)" in capsys.readouterr().out
+    main.run(instance, draw=False, manifest=manifest, threads=2)  # other solver settings
+    assert "Up to date" not in capsys.readouterr().out
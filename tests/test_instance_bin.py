@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import pytest
+
+import main
+import instance_bin
+from conftest import EXAMPLES_DIR
+
+
+@pytest.fixture
+def saved(tmp_path):
+    puzzle = main.parse_instance(os.path.join(EXAMPLES_DIR, "dom06.txt"), as_puzzle=True)
+    path = str(tmp_path / "dom06.thb")
+    instance_bin.save(path, puzzle)
+    return puzzle, path
+
+
+def block_start(puzzle, block):
+    # byte position of "offsets" or "cells" in the file
+    n = puzzle.n
+    pos = instance_bin.HEADER.size + instance_bin.padded(n * n) + 2 * instance_bin.padded(4 * n)
+    if block == "cells":
+        pos += instance_bin.padded(8 * (puzzle.num_thermos + 1))
+    return pos
+
+
+def damage(path, pos, value, size):
+    with open(path, "r+b") as f:
+        f.seek(pos)
+        f.write(int(value).to_bytes(size, "little", signed=True))
+
+
+def test_round_trip(saved):
+    puzzle, path = saved
+    loaded = instance_bin.load(path)
+    assert loaded.n == puzzle.n
+    assert np.array_equal(loaded.offsets, puzzle.offsets)
+    assert np.array_equal(loaded.cells, puzzle.cells)
+    assert np.array_equal(loaded.row_targets, puzzle.row_targets)
+    assert np.array_equal(loaded.col_targets, puzzle.col_targets)
+
+
+def test_truncated(saved):
+    _, path = saved
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 8)
+    assert instance_bin.load(path) is None
+
+
+def test_not_thb(tmp_path):
+    path = tmp_path / "other.thb"
+    path.write_bytes(b"x" * 64)
+    assert instance_bin.load(str(path)) is None
+
+
+@pytest.mark.parametrize("index, value", [(0, 3), (-1, 0), (1, -1)])
+def test_bad_offsets(saved, index, value):
+    puzzle, path = saved
+    index %= puzzle.num_thermos + 1
+    damage(path, block_start(puzzle, "offsets") + 8 * index, value, 8)
+    assert instance_bin.load(path) is None
+
+
+@pytest.mark.parametrize("value", [-1, 400])
+def test_cells_outside_grid(saved, value):
+    puzzle, path = saved
+    damage(path, block_start(puzzle, "cells"), value, 4)
+    assert instance_bin.load(path) is None
@@ -0,0 +1,41 @@
+import glob
+import os
+import pytest
+
+import main
+import encode
+import generate
+import native_solver
+from conftest import EXAMPLES_DIR
+
+INSTANCES = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.txt")) +
+                   glob.glob(os.path.join(EXAMPLES_DIR + "_curved", "*.txt")))
+
+
+def assert_agree(data):
+    size, fills, nummodels = main.solve(encode.encode(data))
+    n_size, n_fills, n_nummodels = native_solver.solve(data)
+    assert n_nummodels == nummodels
+    if nummodels == 1:
+        assert n_size == size
+        assert sorted(n_fills) == sorted(fills)
+
+
+@pytest.mark.parametrize("path", INSTANCES, ids=os.path.basename)
+def test_examples_agree(path):
+    assert_agree(main.parse_instance(path))
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("turn_prob", [0.0, 0.3])
+def test_random_grids_agree(tmp_path, seed, turn_prob):
+    # random targets are often not unique (MULTIPLE), which both solvers must also agree on
+    path = tmp_path / "random.txt"
+    path.write_text(generate.random_instance(7, seed=seed, turn_prob=turn_prob), encoding="utf-8")
+    assert_agree(main.parse_instance(str(path)))
+
+
+def test_puzzle_and_json_data_agree():
+    path = os.path.join(EXAMPLES_DIR, "dom06.txt")
+    assert native_solver.solve_puzzle(main.parse_instance(path, as_puzzle=True)) == \
+        native_solver.solve(main.parse_instance(path))
@@ -0,0 +1,21 @@
+import os
+import pytest
+
+import main
+import portfolio
+from conftest import EXAMPLES_DIR
+
+
+@pytest.mark.parametrize("configuration", ["auto", "many", "crafty", "trendy"])
+def test_portfolio_with_configuration(configuration):
+    # single-solver configurations have one solver entry only (configure() used to index past it)
+    data = main.parse_instance(os.path.join(EXAMPLES_DIR, "dom01.txt"))
+    size, fills, nummodels = main.solve(main.encode.encode(data), threads=2, configuration=configuration)
+    assert size == data["n"]
+    assert nummodels == 1
+
+
+def test_control_args():
+    assert portfolio.control_args(1) == ["--configuration=auto"]
+    assert portfolio.control_args(4, "crafty", "Vsids") == [
+        "--configuration=crafty", "--heuristic=Vsids", "--parallel-mode=4,compete"]
@@ -0,0 +1,41 @@
+import glob
+import os
+import pytest
+
+import main
+import encode
+import generate
+import presolve
+from conftest import EXAMPLES_DIR
+
+INSTANCES = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.txt")) +
+                   glob.glob(os.path.join(EXAMPLES_DIR + "_curved", "*.txt")))
+
+
+def assert_same_result(data):
+    full = main.solve(encode.encode(data))
+    reduced = presolve.reduce(data)
+    if reduced is None:
+        assert full[2] == 0
+        return
+    # every decided cell agrees with the solution
+    fills = set(full[1])
+    if full[2] == 1:
+        assert {(node["r"], node["c"]) for node in reduced["fixed_fill"]} <= fills
+        assert not {(node["r"], node["c"]) for node in reduced["fixed_empty"]} & fills
+    result = main.solve(encode.encode(reduced))
+    assert result[2] == full[2]
+    if full[2] == 1:
+        assert sorted(result[1]) == sorted(full[1])
+
+
+@pytest.mark.parametrize("path", INSTANCES, ids=os.path.basename)
+def test_examples(path):
+    assert_same_result(main.parse_instance(path))
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_random_grids(tmp_path, seed):
+    path = tmp_path / "random.txt"
+    path.write_text(generate.random_instance(7, seed=seed), encoding="utf-8")
+    assert_same_result(main.parse_instance(str(path)))
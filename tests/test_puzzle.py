@@ -0,0 +1,49 @@
+import glob
+import os
+import numpy as np
+import pytest
+
+import main
+import encode
+from puzzle import Puzzle
+from conftest import EXAMPLES_DIR
+
+INSTANCES = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.txt")) +
+                   glob.glob(os.path.join(EXAMPLES_DIR + "_curved", "*.txt")))
+
+
+@pytest.mark.parametrize("path", INSTANCES, ids=os.path.basename)
+def test_json_round_trip(path):
+    data = main.parse_instance(path)
+    puzzle = main.parse_instance(path, as_puzzle=True)
+    assert puzzle.to_json_data() == data
+    again = Puzzle.from_json_data(data)
+    assert np.array_equal(again.offsets, puzzle.offsets)
+    assert np.array_equal(again.cells, puzzle.cells)
+
+
+@pytest.mark.parametrize("path", INSTANCES, ids=os.path.basename)
+def test_lookup_tables(path):
+    puzzle = main.parse_instance(path, as_puzzle=True)
+    for t, cells in enumerate(puzzle.paths()):
+        for pos, (r, c) in enumerate(cells):
+            assert puzzle.lookup(r, c) == (t, pos)
+    for r in range(puzzle.n):
+        assert sorted(puzzle.row(r).tolist()) == sorted(k for k in puzzle.cells.tolist() if k // puzzle.n == r)
+    for c in range(puzzle.n):
+        assert sorted(puzzle.col(c).tolist()) == sorted(k for k in puzzle.cells.tolist() if k % puzzle.n == c)
+
+
+def test_fill_cells():
+    puzzle = main.parse_instance(os.path.join(EXAMPLES_DIR, "dom01.txt"), as_puzzle=True)
+    lengths = [puzzle.length(t) // 2 for t in range(puzzle.num_thermos)]
+    expected = [cell for path, k in zip(puzzle.paths(), lengths) for cell in path[:k]]
+    assert puzzle.fill_cells(lengths) == expected
+
+
+@pytest.mark.parametrize("path", INSTANCES, ids=os.path.basename)
+def test_puzzle_encoders_match_json_encoders(path):
+    data = main.parse_instance(path)
+    puzzle = main.parse_instance(path, as_puzzle=True)
+    assert sorted(encode.encode_puzzle(puzzle)) == sorted(encode.encode(data))
+    assert sorted(encode.encode_thermo_level_puzzle(puzzle)) == sorted(encode.encode_thermo_level(data))
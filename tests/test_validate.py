@@ -0,0 +1,82 @@
+import json
+import os
+import numpy as np
+import pytest
+
+import main
+import encode
+import validate
+from conftest import EXAMPLES_DIR
+
+INSTANCE = os.path.join(EXAMPLES_DIR, "dom01.txt")
+
+
+@pytest.fixture(scope="module")
+def solution():
+    data = main.parse_instance(INSTANCE)
+    size, fills, nummodels = main.solve(encode.encode(data))
+    return main.solution_grid(size, fills)
+
+
+def failed(result, i=0):
+    return [check for check in validate.CHECKS if not result[check][i]]
+
+
+def test_valid_solution(solution):
+    result = validate.validate(INSTANCE, solution)
+    assert result["valid"].tolist() == [True]
+    assert validate.errors(INSTANCE, solution) == []
+
+
+def test_instance_forms(tmp_path, solution):
+    data = main.parse_instance(INSTANCE)
+    json_path = tmp_path / "dom01.json"
+    json_path.write_text(json.dumps(data), encoding="utf-8")
+    for instance in (INSTANCE, str(json_path), data, main.parse_instance(INSTANCE, as_puzzle=True)):
+        assert validate.validate(instance, solution)["valid"].all()
+
+
+def test_wrong_targets():
+    empty = np.zeros((4, 4), dtype=bool)
+    assert failed(validate.validate(INSTANCE, empty)) == ["rows", "cols"]
+    found = validate.errors(INSTANCE, empty)
+    assert "row 0: 0 filled cells, target 1" in found
+    assert len(found) == 8
+
+
+def test_gap_in_thermometer():
+    puzzle = validate.as_puzzle(INSTANCE)
+    t = max(range(puzzle.num_thermos), key=puzzle.length)
+    grid = np.zeros((puzzle.n, puzzle.n), dtype=bool)
+    grid.reshape(-1)[puzzle.path(t)[1]] = True  # the second cell without the bulb
+    assert "thermos" in failed(validate.validate(puzzle, grid))
+    assert any("not the cell before it" in error for error in validate.errors(puzzle, grid))
+
+
+def test_cell_outside_thermometers(tmp_path):
+    path = tmp_path / "outside.txt"
+    path.write_text("D.\nv.\n1 1\n1 1\n", encoding="utf-8")  # the right column has no thermometer
+    grid = ["x.", ".x"]
+    assert "cells" in failed(validate.validate(str(path), grid))
+    assert "cell (1, 1): filled outside a thermometer" in validate.errors(str(path), grid)
+
+
+@pytest.mark.parametrize("bad", [["x..", "..", "x.x."], ["x...", "...."], np.zeros((5, 5), dtype=bool)])
+def test_shape(solution, bad):
+    result = validate.validate(INSTANCE, [solution, bad])
+    assert result["valid"].tolist() == [True, False]
+    assert failed(result, 1) == list(validate.CHECKS)
+    assert len(validate.errors(INSTANCE, bad)) == 1
+
+
+def test_stacked(solution):
+    grids = np.stack([validate.grid_array(solution)] * 3)
+    grids[1, 0, 0] = ~grids[1, 0, 0]
+    assert validate.validate(INSTANCE, grids)["valid"].tolist() == [True, False, True]
+
+
+def test_unparsable_instance(tmp_path):
+    path = tmp_path / "bad.txt"
+    path.write_text("nothing\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        validate.validate(str(path), ["x"])
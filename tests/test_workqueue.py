@@ -0,0 +1,65 @@
+import glob
+import json
+import os
+import time
+
+import workqueue
+from conftest import EXAMPLES_DIR
+
+INSTANCES = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.txt")))
+
+
+def age(path, seconds):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_work_and_merge_in_order(tmp_path):
+    queue = str(tmp_path / "queue")
+    workqueue.init_queue(queue, INSTANCES)
+    assert workqueue.work(queue, worker="test") == len(INSTANCES)
+    out = str(tmp_path / "batch.jsonl")
+    counts, missing = workqueue.merge(queue, out)
+    assert missing == [] and counts == {"UNIQUE": len(INSTANCES)}
+    with open(out, "r", encoding="utf-8") as f:
+        results = [json.loads(line) for line in f]
+    assert [result["instance"] for result in results] == [os.path.abspath(path) for path in INSTANCES]
+    assert os.listdir(os.path.join(queue, "leased")) == []
+
+
+def test_expired_lease_is_retried(tmp_path):
+    queue = str(tmp_path / "queue")
+    workqueue.init_queue(queue, INSTANCES[:1], lease=60, attempts=2)
+    task, leased = workqueue.claim(queue)  # a worker that dies
+    assert workqueue.reclaim(queue, 60, 2, "test") == 0  # still fresh
+    age(leased, 120)
+    assert workqueue.reclaim(queue, 60, 2, "test") == 1
+    task, leased = workqueue.claim(queue)
+    assert task["attempt"] == 2
+    age(leased, 120)  # dies again: given up
+    assert workqueue.reclaim(queue, 60, 2, "test") == 0
+    result = workqueue.read_json(workqueue.task_path(queue, "done", task["id"]))
+    assert result["status"] == "ERROR" and result["attempt"] == 2
+
+
+def test_old_todo_is_not_an_expired_lease(tmp_path):
+    queue = str(tmp_path / "queue")
+    workqueue.init_queue(queue, INSTANCES[:1], lease=60)
+    age(workqueue.task_path(queue, "todo", "00000000"), 3600)  # queued long ago
+    task, leased = workqueue.claim(queue)
+    assert workqueue.reclaim(queue, 60, 3, "test") == 0
+    assert os.path.exists(leased)
+
+
+def test_lost_reclaim_is_recovered(tmp_path):
+    # a process that died between taking an expired lease and moving it back to todo/
+    queue = str(tmp_path / "queue")
+    workqueue.init_queue(queue, INSTANCES[:1], lease=60)
+    task, leased = workqueue.claim(queue)
+    taken = leased + ".host.123.reclaim"
+    os.rename(leased, taken)
+    age(taken, 120)
+    workqueue.reclaim(queue, 60, 3, "test")  # back to leased/ as an expired lease
+    workqueue.reclaim(queue, 60, 3, "test")  # and to todo/
+    task, _ = workqueue.claim(queue)
+    assert task["attempt"] == 2